@@ -1,8 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from database import db
-from models import User, Detection
-from utils import verify_token
+from models import User, Detection, UserStats
+from utils import verify_token, keyset_page
+from user_stats import get_user_stats
+from rollups import rollup_totals, timeseries
+from etags import admin_etag, revalidate, cache_headers
+from detection_archive import get_archive, archive_detections, merge_archived
+from config import Config
+from datetime import datetime, timedelta, timezone
 from sqlalchemy import func
+import heapq
+import csv
+import io
+import json
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -13,26 +23,73 @@ def verify_admin():
         return None
     return user
 
+def with_user_names(detections):
+    """(Detection, full_name, email) rows for archived detections - one users query per page"""
+    user_ids = {d.user_id for d in detections}
+    names = {user_id: (full_name, email) for user_id, full_name, email in
+             db.session.query(User.id, User.full_name, User.email).filter(User.id.in_(user_ids))}
+    return [(d, *names[d.user_id]) for d in detections if d.user_id in names]
+
+# Sortable columns for the admin users listing
+USER_SORT_COLUMNS = {
+    'created_at': User.created_at,
+    'email': User.email,
+    'full_name': User.full_name,
+    'detection_count': func.coalesce(UserStats.total, 0)
+}
+
 @admin_bp.route('/users', methods=['GET'])
 def get_all_users():
-    """Get all users (admin only)"""
+    """Get users with detection counts, paginated (admin only)"""
     admin = verify_admin()
     if not admin:
         return jsonify({'error': 'Unauthorized - Admin access required'}), 403
     
+    etag = revalidate(admin_etag())
+    
     try:
-        users = User.query.all()
+        # Pagination, sorting and search parameters
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = min(max(1, request.args.get('per_page', 50, type=int)), 200)
+        sort = request.args.get('sort', 'created_at')
+        order = request.args.get('order', 'desc')
+        search = request.args.get('q', '').strip()
+        
+        if sort not in USER_SORT_COLUMNS:
+            return jsonify({'error': f"Invalid sort field. Use one of: {', '.join(USER_SORT_COLUMNS)}"}), 400
+        
+        # One query - detection counts come from the per-user counters
+        detection_count = func.coalesce(UserStats.total, 0)
+        query = db.session.query(User, detection_count)\
+            .outerjoin(UserStats, UserStats.user_id == User.id)
+        
+        if search:
+            query = query.filter(User.email.icontains(search, autoescape=True))
+        
+        total = query.order_by(None).count()
+        
+        sort_column = USER_SORT_COLUMNS[sort]
+        sort_column = sort_column.asc() if order == 'asc' else sort_column.desc()
+        rows = query.order_by(sort_column, User.id.desc())\
+            .offset((page - 1) * per_page)\
+            .limit(per_page)\
+            .all()
         
-        # Include detection count for each user
         users_data = []
-        for user in users:
+        for user, count in rows:
             user_dict = user.to_dict()
-            user_dict['detection_count'] = Detection.query.filter_by(user_id=user.id).count()
+            user_dict['detection_count'] = count
             users_data.append(user_dict)
         
         return jsonify({
-            'users': users_data
-        }), 200
+            'users': users_data,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page
+            }
+        }), 200, cache_headers(etag)
         
     except Exception as e:
         print(f"Error in get_all_users: {e}")
@@ -40,26 +97,35 @@ def get_all_users():
 
 @admin_bp.route('/user/<int:user_id>', methods=['GET'])
 def get_user_detail(user_id):
-    """Get detailed user information (admin only)"""
+    """Get detailed user information with their most recent detections (admin only)"""
     admin = verify_admin()
     if not admin:
         return jsonify({'error': 'Unauthorized - Admin access required'}), 403
     
+    etag = revalidate(admin_etag())
+    
     try:
         user = User.query.get(user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get user detections
-        detections = Detection.query.filter_by(user_id=user_id).all()
+        # Most recent detections only - the full count comes from the counters
+        limit = min(max(1, request.args.get('limit', 20, type=int)), 100)
+        detections, next_cursor = keyset_page(
+            Detection.query.filter_by(user_id=user_id),
+            Detection.created_at, Detection.id, limit
+        )
+        detections, _ = merge_archived(detections, next_cursor, limit, user_id=user_id)
         
         user_data = user.to_dict()
         user_data['detections'] = [d.to_dict() for d in detections]
-        user_data['detection_count'] = len(detections)
+        stats = get_user_stats(user_id)
+        user_data['detection_count'] = stats.total
+        user_data['stats'] = stats.to_dict()
         
         return jsonify({
             'user': user_data
-        }), 200
+        }), 200, cache_headers(etag)
         
     except Exception as e:
         print(f"Error in get_user_detail: {e}")
@@ -67,20 +133,39 @@ def get_user_detail(user_id):
 
 @admin_bp.route('/detections', methods=['GET'])
 def get_all_detections():
-    """Get all detections from all users (admin only)"""
+    """Get detections from all users, newest first, one page per request (admin only)"""
     admin = verify_admin()
     if not admin:
         return jsonify({'error': 'Unauthorized - Admin access required'}), 403
     
+    etag = revalidate(admin_etag())
+    
     try:
-        # Join with users to get user names
-        detections = db.session.query(
+        # Keyset pagination - pass next_cursor back as ?cursor= for the next page
+        limit = min(max(1, request.args.get('limit', 50, type=int)), 200)
+        cursor = request.args.get('cursor')
+        user_id = request.args.get('user_id', type=int)
+        
+        # Join with users to get user names - one page at a time
+        query = db.session.query(
             Detection,
             User.full_name,
             User.email
-        ).join(User, Detection.user_id == User.id)\
-         .order_by(Detection.created_at.desc())\
-         .all()
+        ).join(User, Detection.user_id == User.id)
+        
+        if user_id is not None:
+            query = query.filter(Detection.user_id == user_id)
+        
+        detections, next_cursor = keyset_page(
+            query, Detection.created_at, Detection.id, limit, cursor,
+            key=lambda row: row[0]
+        )
+        
+        # Older pages continue into the archive
+        detections, next_cursor = merge_archived(
+            detections, next_cursor, limit, cursor, user_id=user_id,
+            key=lambda row: row[0], wrap=with_user_names
+        )
         
         detections_data = []
         for detection, full_name, email in detections:
@@ -90,13 +175,154 @@ def get_all_detections():
             detections_data.append(det_dict)
         
         return jsonify({
-            'detections': detections_data
-        }), 200
+            'detections': detections_data,
+            'next_cursor': next_cursor
+        }), 200, cache_headers(etag)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in get_all_detections: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Columns of /detections/export, in CSV order
+EXPORT_FIELDS = ('id', 'user_id', 'full_name', 'email', 'file_name', 'file_type', 'file_path',
+                 'result', 'confidence', 'processing_time', 'metadata', 'created_at')
+
+def parse_export_filters():
+    """Read ?from=&to=&result=&file_type=&user_id= - raises ValueError on bad values"""
+    filters = {'user_id': request.args.get('user_id', type=int)}
+    
+    for name, allowed in (('result', ('real', 'fake')), ('file_type', ('image', 'video'))):
+        value = request.args.get(name)
+        if value is not None and value not in allowed:
+            raise ValueError(f"{name} must be one of: {', '.join(allowed)}")
+        filters[name] = value
+    
+    # from is inclusive, to exclusive - a bare date for to means the end of that day;
+    # values with an offset are converted to UTC
+    for name, key in (('from', 'start'), ('to', 'end')):
+        value = request.args.get(name)
+        if value is None:
+            filters[key] = None
+            continue
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f'{name} must be an ISO date or datetime')
+        if parsed.tzinfo is not None:
+            # Stored timestamps are naive UTC
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        if name == 'to' and len(value) == 10:
+            parsed += timedelta(days=1)
+        filters[key] = parsed
+    
+    return filters
+
+def live_export_rows(filters, batch_size):
+    """Export tuples from detection_history, oldest first, through a server-side cursor"""
+    query = db.session.query(
+        Detection.id, Detection.user_id, User.full_name, User.email,
+        Detection.file_name, Detection.file_type, Detection.file_path,
+        Detection.result, Detection.confidence, Detection.processing_time,
+        Detection.extra_data, Detection.created_at
+    ).join(User, Detection.user_id == User.id)
+    
+    if filters['start'] is not None:
+        query = query.filter(Detection.created_at >= filters['start'])
+    if filters['end'] is not None:
+        query = query.filter(Detection.created_at < filters['end'])
+    for name in ('user_id', 'result', 'file_type'):
+        if filters[name] is not None:
+            query = query.filter(getattr(Detection, name) == filters[name])
+    
+    # yield_per streams batch_size rows at a time instead of loading the result
+    for row in query.order_by(Detection.created_at, Detection.id).yield_per(batch_size):
+        yield tuple(row)
+
+def archived_export_rows(filters, batch_size):
+    """Export tuples from the archive, oldest first, with user names looked up per batch"""
+    def flush(batch):
+        for d, full_name, email in with_user_names(batch):
+            yield (d.id, d.user_id, full_name, email, d.file_name, d.file_type, d.file_path,
+                   d.result, d.confidence, d.processing_time, d.extra_data, d.created_at)
+    
+    batch = []
+    for detection in get_archive().iter_matching(**filters):
+        batch.append(detection)
+        if len(batch) >= batch_size:
+            yield from flush(batch)
+            batch = []
+    yield from flush(batch)
+
+def format_export_row(row):
+    """Round and serialize an export tuple the way Detection.to_dict does"""
+    values = dict(zip(EXPORT_FIELDS, row))
+    values['confidence'] = round(values['confidence'], 2)
+    values['processing_time'] = round(values['processing_time'], 2)
+    values['created_at'] = values['created_at'].isoformat() if values['created_at'] else None
+    return values
+
+@admin_bp.route('/detections/export', methods=['GET'])
+def export_detections():
+    """Stream every matching detection (live and archived) as NDJSON or CSV (admin only)"""
+    admin = verify_admin()
+    if not admin:
+        return jsonify({'error': 'Unauthorized - Admin access required'}), 403
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    
+    try:
+        filters = parse_export_filters()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    batch_size = Config.EXPORT_BATCH_SIZE
+    
+    def generate():
+        # Both sources are ordered by (created_at, id) - merge them without buffering
+        rows = heapq.merge(
+            archived_export_rows(filters, batch_size),
+            live_export_rows(filters, batch_size),
+            key=lambda row: (row[-1] or datetime.min, row[0])
+        )
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(EXPORT_FIELDS)
+        
+        # One chunk per batch_size rows keeps writes large and memory flat
+        count = 0
+        for row in rows:
+            values = format_export_row(row)
+            if export_format == 'csv':
+                writer.writerow(values.values())
+            else:
+                buffer.write(json.dumps(values) + '\n')
+            count += 1
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    extension = 'csv' if export_format == 'csv' else 'ndjson'
+    filename = f"detections-{datetime.utcnow():%Y%m%d-%H%M%S}.{extension}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv' if export_format == 'csv' else 'application/x-ndjson',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @admin_bp.route('/stats', methods=['GET'])
 def get_admin_stats():
     """Get system-wide statistics (admin only)"""
@@ -104,18 +330,18 @@ def get_admin_stats():
     if not admin:
         return jsonify({'error': 'Unauthorized - Admin access required'}), 403
     
+    etag = revalidate(admin_etag())
+    
     try:
         total_users = User.query.count()
-        total_detections = Detection.query.count()
-        fake_detections = Detection.query.filter_by(result='fake').count()
-        real_detections = Detection.query.filter_by(result='real').count()
+        total_detections, fake_detections, real_detections = rollup_totals()
         
         return jsonify({
             'total_users': total_users,
             'total_detections': total_detections,
             'fake_detections': fake_detections,
             'real_detections': real_detections
-        }), 200
+        }), 200, cache_headers(etag)
         
     except Exception as e:
         print(f"Error in get_admin_stats: {e}")
@@ -128,19 +354,115 @@ def get_dashboard_stats():
     if not admin:
         return jsonify({'error': 'Unauthorized - Admin access required'}), 403
     
+    etag = revalidate(admin_etag())
+    
     try:
         total_users = User.query.count()
-        total_detections = Detection.query.count()
-        fake_detections = Detection.query.filter_by(result='fake').count()
-        real_detections = Detection.query.filter_by(result='real').count()
+        total_detections, fake_detections, real_detections = rollup_totals()
         
         return jsonify({
             'total_users': total_users,
             'total_detections': total_detections,
             'fake_detections': fake_detections,
             'real_detections': real_detections
-        }), 200
+        }), 200, cache_headers(etag)
         
     except Exception as e:
         print(f"Error in get_dashboard_stats: {e}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/timeseries', methods=['GET'])
+def get_timeseries():
+    """Get daily detection trends from the precomputed rollups (admin only)"""
+    admin = verify_admin()
+    if not admin:
+        return jsonify({'error': 'Unauthorized - Admin access required'}), 403
+    
+    # The window also moves at midnight (UTC)
+    etag = revalidate(f"{admin_etag()}-{datetime.utcnow().date().isoformat()}")
+    
+    try:
+        days = min(max(1, request.args.get('days', 30, type=int)), 366)
+        file_type = request.args.get('file_type')
+        
+        if file_type not in (None, 'image', 'video'):
+            return jsonify({'error': "Invalid file_type. Use 'image' or 'video'."}), 400
+        
+        return jsonify({
+            'days': days,
+            'file_type': file_type,
+            'series': timeseries(days, file_type)
+        }), 200, cache_headers(etag)
+        
+    except Exception as e:
+        print(f"Error in get_timeseries: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/archive', methods=['GET'])
+def get_archive_stats():
+    """Get archived segment counts and sizes (admin only)"""
+    admin = verify_admin()
+    if not admin:
+        return jsonify({'error': 'Unauthorized - Admin access required'}), 403
+    
+    try:
+        return jsonify({
+            'archive': get_archive().stats()
+        }), 200
+        
+    except Exception as e:
+        print(f"Error in get_archive_stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/archive', methods=['POST'])
+def run_archive():
+    """Move detections older than ?days= (default ARCHIVE_AFTER_DAYS) into the archive (admin only)"""
+    admin = verify_admin()
+    if not admin:
+        return jsonify({'error': 'Unauthorized - Admin access required'}), 403
+    
+    days = request.args.get('days', type=int)
+    if days is not None and days < 0:
+        return jsonify({'error': 'days must be zero or positive'}), 400
+    
+    try:
+        archived = archive_detections(days)
+        return jsonify({
+            'message': f'{archived} detections archived',
+            'archived': archived,
+            'archive': get_archive().stats()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in run_archive: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/inference-stats', methods=['GET'])
+def get_inference_stats():
+    """Get inference, video pipeline, result cache, auth cache and detection writer statistics (admin only)"""
+    admin = verify_admin()
+    if not admin:
+        return jsonify({'error': 'Unauthorized - Admin access required'}), 403
+    
+    try:
+        from detection_routes import get_inference_engine
+        from result_cache import get_result_cache
+        from video_pipeline import pipeline_stats
+        from analysis_tiers import timing_stats
+        from auth_cache import get_principal_cache
+        from detection_writer import get_detection_writer
+        
+        writer = get_detection_writer()
+        return jsonify({
+            'inference': get_inference_engine().stats(),
+            'video_pipeline': pipeline_stats(),
+            'analysis_timing': timing_stats(),
+            'auth_cache': get_principal_cache().stats(),
+            'detection_writer': writer.stats() if writer else None,
+            'result_cache': get_result_cache().stats()
+        }), 200
+        
+    except Exception as e:
+        print(f"Error in get_inference_stats: {e}")
+        return jsonify({'error': str(e)}), 500
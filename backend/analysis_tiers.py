@@ -0,0 +1,161 @@
+"""
+Latency-budgeted analysis tiers
+A request picks a named tier (fast / balanced / thorough) or a latency budget.
+Tiers map to frame count, sampling mode, image decode resolution and
+inference backend. For a budget, the frame count is the largest one that a
+cost model fitted to recent video timings predicts will finish in time.
+"""
+
+import threading
+from collections import deque
+from config import Config
+
+
+class LatencyModel:
+    """Least-squares fit of seconds ≈ overhead + per_frame × frames over recent runs"""
+
+    def __init__(self, window=50):
+        self._samples = deque(maxlen=max(2, int(window)))
+        self._lock = threading.Lock()
+
+    def record(self, frames, seconds):
+        """Add one finished analysis"""
+        if frames > 0 and seconds >= 0:
+            with self._lock:
+                self._samples.append((frames, seconds))
+
+    def fit(self):
+        """Return (overhead_s, per_frame_s), or None without observations"""
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return None
+
+        n = len(samples)
+        mean_x = sum(x for x, _ in samples) / n
+        mean_y = sum(y for _, y in samples) / n
+        variance = sum((x - mean_x) ** 2 for x, _ in samples)
+
+        if variance > 0:
+            per_frame = sum((x - mean_x) * (y - mean_y) for x, y in samples) / variance
+            overhead = mean_y - per_frame * mean_x
+        else:
+            # All runs used the same frame count - attribute the whole cost to frames
+            per_frame, overhead = 0.0, 0.0
+
+        if per_frame <= 0:
+            per_frame = mean_y / mean_x
+            overhead = 0.0
+        return max(0.0, overhead), per_frame
+
+    def estimate(self, frames):
+        """Predicted seconds for an analysis of frames frames, or None"""
+        fit = self.fit()
+        if fit is None:
+            return None
+        overhead, per_frame = fit
+        return overhead + per_frame * frames
+
+    def max_frames(self, budget_s, min_frames, max_frames):
+        """Largest frame count predicted to fit the budget (None without observations)"""
+        fit = self.fit()
+        if fit is None:
+            return None
+        overhead, per_frame = fit
+        frames = int((budget_s - overhead) / per_frame)
+        return max(min_frames, min(max_frames, frames))
+
+    def stats(self):
+        fit = self.fit()
+        with self._lock:
+            count = len(self._samples)
+        if fit is None:
+            return {'samples': 0}
+        return {
+            'samples': count,
+            'overhead_ms': round(fit[0] * 1000, 2),
+            'per_frame_ms': round(fit[1] * 1000, 2)
+        }
+
+
+# One cost model per (inference backend, sampling mode) - adaptive runs pay
+# for coarse-to-fine seeking and would skew the fixed-sampling fit that sizes
+# budget requests (created on first use)
+_LATENCY_MODELS = {}
+_LATENCY_LOCK = threading.Lock()
+
+def get_latency_model(backend_name, sampling='fixed'):
+    """Return the cost model for a backend and sampling mode, creating it on first use"""
+    key = (backend_name, sampling)
+    with _LATENCY_LOCK:
+        if key not in _LATENCY_MODELS:
+            _LATENCY_MODELS[key] = LatencyModel(Config.ANALYSIS_TIMING_WINDOW)
+        return _LATENCY_MODELS[key]
+
+def record_cost(backend_name, frames, seconds, sampling='fixed'):
+    """Feed one finished video analysis into the cost model of its backend and sampling mode"""
+    get_latency_model(backend_name, sampling).record(frames, seconds)
+
+def timing_stats():
+    """Fitted costs per backend and sampling mode, for the admin stats endpoint"""
+    with _LATENCY_LOCK:
+        models = dict(_LATENCY_MODELS)
+    return {f'{name}/{sampling}': model.stats() for (name, sampling), model in models.items()}
+
+def resolve_tier(tier=None, budget_ms=None):
+    """
+    Turn a requested tier or latency budget into an analysis plan
+
+    Returns a dict with tier, frames, sampling, backend (None = the loaded
+    model), image_reduce and, for budgets, budget_ms and predicted_ms.
+    Raises ValueError for unknown tiers or non-positive budgets.
+    """
+    if budget_ms is not None:
+        if budget_ms <= 0:
+            raise ValueError('budget_ms must be positive')
+
+        plan = dict(Config.ANALYSIS_TIERS[Config.ANALYSIS_DEFAULT_TIER], tier='budget', budget_ms=budget_ms)
+        plan['sampling'] = 'fixed'  # Adaptive sampling cannot promise a cost up front
+
+        model = get_latency_model(plan_backend_name(plan), 'fixed')
+        frames = model.max_frames(budget_ms / 1000.0, Config.ANALYSIS_BUDGET_MIN_FRAMES,
+                                  Config.ANALYSIS_BUDGET_MAX_FRAMES)
+        if frames is not None:
+            plan['frames'] = frames
+            plan['predicted_ms'] = round(model.estimate(frames) * 1000, 1)
+        return plan
+
+    tier = tier or Config.ANALYSIS_DEFAULT_TIER
+    if tier not in Config.ANALYSIS_TIERS:
+        raise ValueError(f"Unknown analysis tier '{tier}' - choose from {', '.join(Config.ANALYSIS_TIERS)}")
+    return dict(Config.ANALYSIS_TIERS[tier], tier=tier)
+
+def plan_backend_name(plan):
+    """Backend a plan runs on - a tier without its own backend uses the loaded model"""
+    return plan.get('backend') or Config.INFERENCE_BACKEND
+
+
+# Extra backends used by tiers (created on first use, None if unavailable)
+_TIER_BACKENDS = {}
+_TIER_BACKENDS_LOCK = threading.Lock()
+
+def get_tier_backend(plan):
+    """
+    Return the backend for a plan, or None to use the loaded model
+    A tier backend that cannot be loaded (e.g. not exported yet) falls back
+    to the loaded model instead of failing the request.
+    """
+    name = plan.get('backend')
+    if not name or name == Config.INFERENCE_BACKEND or Config.MODEL_SERVER_ENABLED:
+        return None
+
+    with _TIER_BACKENDS_LOCK:
+        if name not in _TIER_BACKENDS:
+            try:
+                from inference_backends import create_backend
+                _TIER_BACKENDS[name] = create_backend(name)
+                print(f"✓ Tier backend [{name}] loaded")
+            except Exception as e:
+                print(f"⚠ Tier backend [{name}] unavailable, using the loaded model: {e}")
+                _TIER_BACKENDS[name] = None
+        return _TIER_BACKENDS[name]
@@ -1,7 +1,8 @@
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from config import config
-from database import db
+from database import db, init_engine, create_missing_indexes, seed_default_users
+from model_loader import MODEL_LOADER
 import os
 
 def create_app(config_name='development'):
@@ -16,12 +17,17 @@ def create_app(config_name='development'):
     
     # Initialize extensions
     db.init_app(app)
+    with app.app_context():
+        init_engine(app, app.config.get('SQLITE_PRAGMAS'))
     CORS(app)  # Enable CORS for all routes
     
     # Create necessary directories
     os.makedirs('uploads/images', exist_ok=True)
     os.makedirs('uploads/videos', exist_ok=True)
     
+    # Load the ML model in the background - /ready reports when it is warm
+    MODEL_LOADER.start()
+    
     # Register blueprints
     try:
         from auth_routes import auth_bp
@@ -48,9 +54,55 @@ def create_app(config_name='development'):
     with app.app_context():
         try:
             db.create_all()
+            create_missing_indexes()
+            seed_default_users()
             print("✓ Database tables created successfully")
         except Exception as e:
             print(f"✗ Database error: {e}")
+        
+        # Per-user counters maintained alongside every detection insert
+        try:
+            from user_stats import init_user_stats
+            init_user_stats()
+        except Exception as e:
+            print(f"✗ Error initializing user stats: {e}")
+        
+        # Daily rollups for the admin dashboard, also maintained on insert
+        try:
+            from rollups import init_rollups
+            init_rollups()
+        except Exception as e:
+            print(f"✗ Error initializing daily rollups: {e}")
+        
+        # Change counters behind the ETags of history, stats and admin views
+        try:
+            from etags import init_etags
+            init_etags()
+        except Exception as e:
+            print(f"✗ Error initializing ETags: {e}")
+    
+    # Start background video job workers
+    try:
+        from video_jobs import init_video_jobs
+        init_video_jobs(app)
+        print("✓ Video job workers started")
+    except Exception as e:
+        print(f"✗ Error starting video job workers: {e}")
+    
+    # Periodic flush of result cache hit counts (lookups themselves never write)
+    try:
+        from result_cache import init_result_cache
+        init_result_cache(app)
+    except Exception as e:
+        print(f"✗ Error starting result cache flusher: {e}")
+    
+    # Start the group-commit writer for detection rows (write-behind modes only)
+    try:
+        from detection_writer import init_detection_writer
+        if init_detection_writer(app):
+            print("✓ Detection writer started")
+    except Exception as e:
+        print(f"✗ Error starting detection writer: {e}")
     
     # Serve frontend files
     @app.route('/')
@@ -66,7 +118,13 @@ def create_app(config_name='development'):
     # Health check
     @app.route('/health')
     def health():
-        return {'status': 'healthy'}, 200
+        return {'status': 'healthy', 'model': MODEL_LOADER.status()}, 200
+    
+    # Readiness check - 503 until the model is loaded and warmed up
+    @app.route('/ready')
+    def ready():
+        status = MODEL_LOADER.status()
+        return {'ready': status['ready'], 'model': status}, 200 if status['ready'] else 503
     
     return app
 
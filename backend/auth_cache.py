@@ -0,0 +1,151 @@
+"""
+Authenticated-principal cache
+Maps a verified bearer token to a small immutable Principal so protected
+routes skip the JWT decode and the users-table lookup on repeat requests.
+Entries expire after a TTL (never past the token's own expiry), the cache is
+LRU-bounded, and any committed change to a user row drops that user's entries.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import User
+
+# What routes need to know about the caller - no ORM instance, no session
+Principal = namedtuple('Principal', ['id', 'is_admin', 'is_verified'])
+
+
+def principal_from_user(user):
+    """Snapshot a User row as a Principal"""
+    return Principal(id=user.id, is_admin=bool(user.is_admin), is_verified=bool(user.is_verified))
+
+
+class PrincipalCache:
+    """Bounded TTL/LRU cache of token → Principal"""
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._entries = OrderedDict()  # token → (principal, expires_at)
+        self._tokens_by_user = {}  # user id → set of cached tokens
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, token):
+        """Return the cached Principal for a token, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            principal, expires_at = entry
+            if expires_at <= now:
+                self._remove(token)
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self._hits += 1
+            return principal
+
+    def put(self, token, principal, token_exp=None):
+        """Cache a principal - token_exp (unix time) caps the entry's lifetime"""
+        expires_at = time.monotonic() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, time.monotonic() + (token_exp - time.time()))
+
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token of a user (their row changed)"""
+        with self._lock:
+            tokens = self._tokens_by_user.pop(user_id, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            if tokens:
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token):
+        principal, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+    def stats(self):
+        """Report hit rate and size, for tuning the TTL and bound"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
+
+
+def _collect_changed_users(session, flush_context):
+    """after_flush hook - note updated or deleted users until the transaction ends"""
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault('changed_user_ids', set()).add(obj.id)
+
+def _invalidate_changed_users(session):
+    """after_commit hook - forget principals of users changed in the committed transaction"""
+    user_ids = session.info.pop('changed_user_ids', ())
+    if PRINCIPAL_CACHE is not None:
+        for user_id in user_ids:
+            PRINCIPAL_CACHE.invalidate_user(user_id)
+
+def _discard_changed_users(session):
+    """after_rollback hook - rolled-back changes never reached other requests"""
+    session.info.pop('changed_user_ids', None)
+
+
+# Shared cache (created on first use)
+PRINCIPAL_CACHE = None
+
+def get_principal_cache():
+    """Return the shared principal cache, creating it (and its invalidation hooks) on first use"""
+    global PRINCIPAL_CACHE
+    if PRINCIPAL_CACHE is None:
+        from config import Config
+        PRINCIPAL_CACHE = PrincipalCache(Config.AUTH_CACHE_MAX_ENTRIES, Config.AUTH_CACHE_TTL)
+        # Invalidate on commit, not flush - until then other requests still
+        # read (and could re-cache) the old row
+        hooks = (
+            ('after_flush', _collect_changed_users),
+            ('after_commit', _invalidate_changed_users),
+            ('after_rollback', _discard_changed_users)
+        )
+        for name, hook in hooks:
+            if not event.contains(Session, name, hook):
+                event.listen(Session, name, hook)
+    return PRINCIPAL_CACHE
@@ -0,0 +1,61 @@
+"""
+Auth Overhead Benchmark
+Per-request cost of utils.verify_token with and without the principal cache
+(JWT decode + users lookup vs. one dictionary hit) on a throwaway SQLite database
+"""
+
+import os
+import time
+import tempfile
+from flask import Flask
+from config import Config
+from database import db
+from models import User
+from auth_routes import create_token
+from auth_cache import get_principal_cache
+from utils import verify_token
+
+def time_requests(app, headers, requests):
+    """Return microseconds per verify_token call inside a request context"""
+    with app.test_request_context(headers=headers):
+        verify_token()  # Warm-up
+        start = time.perf_counter()
+        for _ in range(requests):
+            verify_token()
+            db.session.remove()  # Fresh session per request, as at request teardown
+        return (time.perf_counter() - start) / requests * 1e6
+
+def run_benchmark(requests=5000):
+    """Print per-request auth overhead, uncached vs cached"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        user = User(full_name='Bench User', email='bench@example.com', password='bench', is_admin=False)
+        db.session.add(user)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_token(user.id)}'}
+
+        Config.AUTH_CACHE_ENABLED = False
+        uncached = time_requests(app, headers, requests)
+
+        Config.AUTH_CACHE_ENABLED = True
+        get_principal_cache().clear()
+        cached = time_requests(app, headers, requests)
+        stats = get_principal_cache().stats()
+
+    print("=" * 70)
+    print("AUTH OVERHEAD BENCHMARK")
+    print("=" * 70)
+    print(f"{requests} verify_token calls with one user token")
+    print(f"{'mode':<36}{'µs / request':>14}")
+    print(f"{'uncached (JWT decode + user query)':<36}{uncached:>14.1f}")
+    print(f"{'principal cache':<36}{cached:>14.1f}")
+    print(f"Speed-up: {uncached / cached:.1f}x   cache hit rate: {stats['hit_rate'] * 100:.1f}%")
+
+if __name__ == "__main__":
+    run_benchmark()
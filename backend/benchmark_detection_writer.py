@@ -0,0 +1,102 @@
+"""
+Detection Insert Benchmark
+Inserts/sec for concurrent request threads committing their own Detection rows
+(one transaction each) vs. handing them to the group-commit writer, on a
+throwaway SQLite database with the production pragmas and flush hooks
+"""
+
+import os
+import json
+import time
+import tempfile
+import threading
+from flask import Flask
+from config import Config
+from database import db, engine_options, init_engine
+from models import User, Detection
+from detection_writer import DetectionWriter
+from user_stats import init_user_stats
+from rollups import init_rollups
+from etags import init_etags
+
+def make_detection(user_id, i):
+    return Detection(
+        user_id=user_id,
+        file_name=f'bench_{i}.jpg',
+        file_path=f'uploads/images/bench_{i}.jpg',
+        file_type='image',
+        result='fake' if i % 2 else 'real',
+        confidence=80.0,
+        processing_time=0.05,
+        extra_data=json.dumps({'cache_hit': False})
+    )
+
+def run_threads(app, threads, per_thread, insert):
+    """Run insert(user_id, i) from several request-like threads - returns inserts/sec"""
+    def worker(offset):
+        with app.app_context():
+            for i in range(per_thread):
+                insert(1, offset + i)
+            db.session.remove()
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return threads * per_thread / (time.perf_counter() - start)
+
+def run_benchmark(threads=16, per_thread=100, max_batch_size=64, max_wait_ms=2):
+    """Print inserts/sec for per-request commits vs group commits"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    uri = f'sqlite:///{db_path}'
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri, Config)
+    db.init_app(app)
+
+    with app.app_context():
+        init_engine(app, Config.SQLITE_PRAGMAS)
+        db.create_all()
+        init_user_stats()
+        init_rollups()
+        init_etags()
+        db.session.add(User(full_name='Bench User', email='bench@example.com', password='bench', is_admin=False))
+        db.session.commit()
+
+    def insert_sync(user_id, i):
+        db.session.add(make_detection(user_id, i))
+        db.session.commit()
+
+    writer = DetectionWriter(app, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+    def insert_group(user_id, i):
+        writer.submit(make_detection(user_id, i)).result()
+
+    sync_rate = run_threads(app, threads, per_thread, insert_sync)
+    group_rate = run_threads(app, threads, per_thread, insert_group)
+    writer.close()
+    stats = writer.stats()
+
+    # Fire-and-forget - timed until close() has flushed the queue
+    async_writer = DetectionWriter(app, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    start = time.perf_counter()
+    run_threads(app, threads, per_thread, lambda user_id, i: async_writer.submit(make_detection(user_id, i)))
+    async_writer.close(timeout=None)
+    async_rate = threads * per_thread / (time.perf_counter() - start)
+
+    print("=" * 70)
+    print("DETECTION INSERT BENCHMARK")
+    print("=" * 70)
+    print(f"{threads} threads x {per_thread} inserts, pragmas: {Config.SQLITE_PRAGMAS}")
+    print(f"{'mode':<36}{'inserts / sec':>14}")
+    print(f"{'per-request commit':<36}{sync_rate:>14.0f}")
+    print(f"{'group commit (waits for id)':<36}{group_rate:>14.0f}")
+    print(f"{'async (until queue flushed)':<36}{async_rate:>14.0f}")
+    print(f"Group commit speed-up: {group_rate / sync_rate:.1f}x   avg batch: {stats['avg_batch_size']} rows "
+          f"(max {max_batch_size}, wait {max_wait_ms} ms)")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,71 @@
+"""
+Frame Sampler Benchmark
+Compare sequential grab()/retrieve() sampling with seek-per-frame sampling
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import cv2
+from frame_sampler import sample_frames, sample_frames_seek
+
+def create_test_video(path, num_frames=900, size=(640, 360), fps=30):
+    """Write a synthetic video with moving content so frames differ"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    width, height = size
+
+    for i in range(num_frames):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        frame[:, :, 0] = (i * 3) % 256
+        cv2.circle(frame, ((i * 7) % width, height // 2), 40, (255, 255, 255), -1)
+        writer.write(frame)
+
+    writer.release()
+
+def time_sampler(video_path, sampler, num_frames, repeats=3):
+    """Return best-of-N seconds to sample num_frames evenly spaced frames"""
+    best = float('inf')
+    count = 0
+
+    for _ in range(repeats):
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+
+        start = time.perf_counter()
+        count = sum(1 for _ in sampler(cap, frame_indices))
+        best = min(best, time.perf_counter() - start)
+
+        cap.release()
+
+    return best, count
+
+def run_benchmark(video_path, frame_counts=(10, 30, 100)):
+    """Print timings for both samplers"""
+    print("=" * 60)
+    print("FRAME SAMPLER BENCHMARK")
+    print("=" * 60)
+    print(f"Video: {video_path}")
+    print(f"{'frames':>8} {'seek (ms)':>12} {'sequential (ms)':>16} {'speedup':>9}")
+
+    for num_frames in frame_counts:
+        seek_time, seek_count = time_sampler(video_path, sample_frames_seek, num_frames)
+        seq_time, seq_count = time_sampler(video_path, sample_frames, num_frames)
+
+        if seek_count != seq_count:
+            print(f"⚠ Frame count mismatch: seek={seek_count}, sequential={seq_count}")
+
+        print(f"{num_frames:>8} {seek_time * 1000:>12.1f} {seq_time * 1000:>16.1f} "
+              f"{seek_time / seq_time:>8.2f}x")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_benchmark(sys.argv[1])
+    else:
+        # No video given - benchmark on a synthetic clip
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            video_path = os.path.join(tmp_dir, 'benchmark.mp4')
+            create_test_video(video_path)
+            run_benchmark(video_path)
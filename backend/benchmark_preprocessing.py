@@ -0,0 +1,74 @@
+"""
+Preprocessing Microbenchmark
+Compare the old per-frame pipeline (resize → cvtColor → astype/255 → expand_dims
+→ concatenate) with writing uint8 RGB straight into a preallocated FrameBatch
+"""
+
+import time
+import tracemalloc
+import numpy as np
+import cv2
+from preprocessing import FrameBatch, to_float
+
+def old_pipeline(frames):
+    """Per-frame float conversion, then a batch built from the pieces"""
+    batch = []
+    for frame in frames:
+        image = cv2.resize(frame, (224, 224))
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image = image.astype(np.float32) / 255.0
+        image = np.expand_dims(image, axis=0)
+        batch.append(image)
+    return np.concatenate(batch)
+
+def new_pipeline(frames, frame_batch):
+    """uint8 slots in a reusable buffer - scaling happens once per batch in the runtime"""
+    frame_batch.clear()
+    for frame in frames:
+        frame_batch.add(frame)
+    return frame_batch.view()
+
+def measure(fn, repeats=20):
+    """Return (ms per frame, peak traced bytes per call)"""
+    fn()  # Warm-up
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed / repeats, peak
+
+def run_benchmark(num_frames=32, frame_size=(720, 1280)):
+    """Print time and allocations per frame for both pipelines"""
+    frames = [
+        np.random.randint(0, 256, frame_size + (3,), dtype=np.uint8)
+        for _ in range(num_frames)
+    ]
+    frame_batch = FrameBatch(num_frames)
+
+    old_time, old_peak = measure(lambda: old_pipeline(frames))
+    new_time, new_peak = measure(lambda: new_pipeline(frames, frame_batch))
+
+    # What a float-input model still pays: one conversion per batch
+    convert_time, convert_peak = measure(lambda: to_float(new_pipeline(frames, frame_batch)))
+
+    print("=" * 70)
+    print("PREPROCESSING MICROBENCHMARK")
+    print("=" * 70)
+    print(f"{num_frames} frames of {frame_size[1]}x{frame_size[0]} → 224x224")
+    print(f"{'pipeline':<32}{'ms / frame':>12}{'peak KiB / frame':>20}")
+    for name, elapsed, peak in (
+        ('old (float per frame)', old_time, old_peak),
+        ('new (uint8 into FrameBatch)', new_time, new_peak),
+        ('new + one batch to_float', convert_time, convert_peak),
+    ):
+        print(f"{name:<32}{elapsed * 1000 / num_frames:>12.3f}{peak / 1024 / num_frames:>20.1f}")
+
+if __name__ == "__main__":
+    run_benchmark()
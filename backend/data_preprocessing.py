@@ -8,6 +8,7 @@ import cv2
 import shutil
 from pathlib import Path
 import random
+from frame_sampler import sample_frames
 
 def extract_frames_from_video(video_path, output_dir, num_frames=10):
     """Extract frames from a single video"""
@@ -27,15 +28,11 @@ def extract_frames_from_video(video_path, output_dir, num_frames=10):
         saved_count = 0
         video_name = Path(video_path).stem
         
-        for idx in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-            ret, frame = cap.read()
-            
-            if ret:
-                frame_filename = f"{video_name}_frame_{idx}.jpg"
-                frame_path = os.path.join(output_dir, frame_filename)
-                cv2.imwrite(frame_path, frame)
-                saved_count += 1
+        for idx, frame in sample_frames(cap, frame_indices):
+            frame_filename = f"{video_name}_frame_{idx}.jpg"
+            frame_path = os.path.join(output_dir, frame_filename)
+            cv2.imwrite(frame_path, frame)
+            saved_count += 1
         
         cap.release()
         return saved_count
@@ -1,9 +1,123 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, update, insert, and_, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.dialects import sqlite as sqlite_dialect, postgresql
 import sqlite3
 import os
 
 db = SQLAlchemy()
 
+# Dialects with INSERT ... ON CONFLICT DO UPDATE (SQLite ≥ 3.24, PostgreSQL ≥ 9.5)
+UPSERT_INSERTS = {
+    'sqlite': sqlite_dialect.insert,
+    'postgresql': postgresql.insert
+}
+
+def engine_options(uri, config):
+    """
+    SQLAlchemy engine options for the database profile in config
+    File-backed SQLite and server databases get a sized connection pool;
+    in-memory SQLite keeps SQLAlchemy's single-connection pool.
+    """
+    url = make_url(uri)
+    options = {'pool_pre_ping': True}
+    
+    if url.get_backend_name() == 'sqlite':
+        # Wait on a locked database (busy_timeout) and share connections across threads
+        options['connect_args'] = {
+            'timeout': config.SQLITE_PRAGMAS.get('busy_timeout', 5000) / 1000.0,
+            'check_same_thread': False
+        }
+        if url.database in (None, '', ':memory:'):
+            return options
+    else:
+        options['pool_recycle'] = config.DATABASE_POOL_RECYCLE
+    
+    options['pool_size'] = config.DATABASE_POOL_SIZE
+    options['max_overflow'] = config.DATABASE_POOL_MAX_OVERFLOW
+    options['pool_timeout'] = config.DATABASE_POOL_TIMEOUT
+    return options
+
+def init_engine(app, pragmas):
+    """Apply the SQLite pragmas to every new connection (no-op for server databases)"""
+    engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    
+    event.listen(engine, 'connect', apply_pragmas)
+    
+    # Report the journal mode actually in effect (WAL needs a file-backed database)
+    with engine.connect() as connection:
+        mode = connection.exec_driver_sql('PRAGMA journal_mode').scalar()
+        print(f"✓ SQLite profile applied (journal_mode={mode})")
+
+def create_missing_indexes():
+    """
+    Create model indexes absent from existing tables - create_all() only
+    builds indexes together with a new table, so databases created before an
+    index was added would keep scanning without it
+    """
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine, checkfirst=True)
+                created.append(index.name)
+    if created:
+        print(f"✓ Created missing indexes: {', '.join(created)}")
+    return created
+
+def increment_counters(connection, table, key, deltas):
+    """
+    Add deltas to the counter columns of the row identified by key (column → value),
+    inserting the row when it does not exist yet. Runs on the given connection,
+    so it commits or rolls back with the caller's transaction.
+    SQLite and PostgreSQL use one INSERT ... ON CONFLICT DO UPDATE, so two
+    transactions creating the same row at once both succeed.
+    """
+    dialect = connection.dialect.name
+    if dialect in UPSERT_INSERTS:
+        statement = UPSERT_INSERTS[dialect](table).values(**key, **deltas)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + statement.excluded[name] for name in deltas}
+        ))
+        return
+    
+    condition = and_(*[table.c[name] == value for name, value in key.items()])
+    updated = connection.execute(
+        update(table).where(condition).values(
+            {name: table.c[name] + value for name, value in deltas.items()}
+        )
+    )
+    if updated.rowcount == 0:
+        connection.execute(insert(table).values(**key, **deltas))
+
+def seed_default_users():
+    """
+    Create the default accounts from schema.sql when the users table is empty
+    (server databases are created from the models and skip schema.sql)
+    """
+    from models import User
+    
+    if User.query.first() is not None:
+        return
+    
+    db.session.add_all([
+        User(full_name='Admin User', email='admin@deepfake.com', password='admin123', is_admin=True, is_verified=True),
+        User(full_name='Test User', email='test@example.com', password='test123', is_admin=False, is_verified=True)
+    ])
+    db.session.commit()
+    print("✓ Default accounts created")
+
 def init_db(db_path='database/deepfake.db', schema_path='database/schema.sql'):
     """Initialize database with schema"""
     
@@ -0,0 +1,478 @@
+"""
+Hot/cold archival of detection_history
+Detections older than ARCHIVE_AFTER_DAYS leave the live table for
+append-only segment files: one compressed NumPy .npz per segment, one array
+per column (text as UTF-8 bytes + offsets, result/file type dictionary-coded),
+listed with their key ranges and per-user row counts in a small JSON
+manifest. The archive lives next to the SQLite file (or in a directory named
+after the server database) unless ARCHIVE_DIR is set. Per-user and daily
+counters are not touched - archived rows still count - and keyset listings
+merge archived rows back in once a page reaches past the newest archived row.
+
+Rows referenced by an analysis job stay live so /jobs/<id> keeps resolving.
+
+Archive everything older than the configured age:
+    python detection_archive.py [days]
+"""
+
+import os
+import re
+import json
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from database import db
+from models import Detection, AnalysisJob
+
+try:
+    import fcntl
+except ImportError:  # Windows - archival runs are not serialized across processes
+    fcntl = None
+
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = 'archive.lock'
+
+EPOCH = datetime(1970, 1, 1)
+
+# Low-cardinality columns, stored as uint8 codes plus a per-segment dictionary
+CATEGORY_COLUMNS = ('result', 'file_type')
+
+# Free-text columns, stored as concatenated UTF-8 plus offsets
+TEXT_COLUMNS = ('file_name', 'file_path', 'extra_data')
+
+
+def to_micros(value):
+    """Naive UTC datetime → integer microseconds since the epoch"""
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+def from_micros(value):
+    return EPOCH + timedelta(microseconds=int(value))
+
+def _encode_text(values):
+    """List of str/None → (utf-8 bytes, offsets, null mask)"""
+    encoded = [(v or '').encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    nulls = np.array([v is None for v in values], dtype=bool)
+    return data, offsets, nulls
+
+def _decode_text(data, offsets, nulls, index):
+    if nulls[index]:
+        return None
+    return data[offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+def _encode_category(values):
+    """List of str → (uint8 codes, dictionary as a JSON string)"""
+    dictionary = sorted(set(values))
+    codes = np.array([dictionary.index(v) for v in values], dtype=np.uint8)
+    return codes, np.array(json.dumps(dictionary))
+
+
+class _Segment:
+    """One segment file - columns are decompressed on first use and kept"""
+
+    def __init__(self, path):
+        self.path = path
+        self._columns = {}
+
+    def columns(self, *names):
+        missing = [name for name in names if name not in self._columns]
+        if missing:
+            with np.load(self.path) as npz:
+                for name in missing:
+                    self._columns[name] = npz[name]
+        return [self._columns[name] for name in names]
+
+    def values(self, name):
+        """A whole column, with dictionary-coded columns decoded to str arrays"""
+        if name in CATEGORY_COLUMNS:
+            codes, dictionary = self.columns(name, f'{name}_dictionary')
+            return np.array(json.loads(str(dictionary)), dtype=object)[codes]
+        return self.columns(name)[0]
+
+    def detection(self, index):
+        """Rebuild row index as a transient (never added to a session) Detection"""
+        ids, user_ids, created_at, confidence, processing_time = self.columns(
+            'id', 'user_id', 'created_at', 'confidence', 'processing_time'
+        )
+        values = {}
+        for name in CATEGORY_COLUMNS:
+            codes, dictionary = self.columns(name, f'{name}_dictionary')
+            values[name] = json.loads(str(dictionary))[codes[index]]
+        for name in TEXT_COLUMNS:
+            data, offsets, nulls = self.columns(f'{name}_data', f'{name}_offsets', f'{name}_nulls')
+            values[name] = _decode_text(data, offsets, nulls, index)
+
+        return Detection(
+            id=int(ids[index]),
+            user_id=int(user_ids[index]),
+            created_at=from_micros(created_at[index]),
+            confidence=float(confidence[index]),
+            processing_time=float(processing_time[index]),
+            **values
+        )
+
+
+def _has_user(entry, user_id):
+    """Whether a manifest entry may hold rows of user_id"""
+    return user_id is None or str(user_id) in entry['users']
+
+
+class DetectionArchive:
+    """Manifest + segment files of one archive directory"""
+
+    def __init__(self, directory, cache_segments=8):
+        self.directory = str(directory)
+        self.cache_segments = max(1, int(cache_segments))
+        self._manifest = None
+        self._manifest_mtime = None
+        self._cache = OrderedDict()  # file name → _Segment
+        self._lock = threading.Lock()
+
+    # --- Manifest ---
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def segments(self):
+        """Segment entries from the manifest (re-read when another process appended one)"""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                with open(self.manifest_path) as f:
+                    self._manifest = json.load(f)
+                self._manifest_mtime = mtime
+            return list(self._manifest['segments'])
+
+    def newest_key(self, user_id=None):
+        """(created_at µs, id) of the newest segment end (holding rows of user_id), or None"""
+        keys = [tuple(segment['last']) for segment in self.segments() if _has_user(segment, user_id)]
+        return max(keys) if keys else None
+
+    def _write_atomic(self, path, write):
+        """Write through a temp file + rename, so readers never see a partial file"""
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    # --- Writing ---
+
+    @contextmanager
+    def lock(self):
+        """Exclusive lock across processes (CLI, web workers) for one archival run"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_NAME), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, rows):
+        """
+        Write rows (detection_history mappings, sorted by created_at, id) as a
+        new segment and list it in the manifest - returns the manifest entry
+        Call under lock(): segment names and the manifest are read-modify-write
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self.segments()
+        name = f'segment-{len(segments) + 1:06d}.npz'
+
+        ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        user_ids = np.array([row['user_id'] for row in rows], dtype=np.int64)
+        created_at = np.array([to_micros(row['created_at']) for row in rows], dtype=np.int64)
+        columns = {
+            'id': ids,
+            'user_id': user_ids,
+            'created_at': created_at,
+            'confidence': np.array([row['confidence'] for row in rows], dtype=np.float64),
+            'processing_time': np.array([row['processing_time'] for row in rows], dtype=np.float64),
+        }
+        for column in CATEGORY_COLUMNS:
+            columns[column], columns[f'{column}_dictionary'] = _encode_category([row[column] for row in rows])
+        for column in TEXT_COLUMNS:
+            key = 'metadata' if column == 'extra_data' else column
+            data, offsets, nulls = _encode_text([row[key] for row in rows])
+            columns[f'{column}_data'] = data
+            columns[f'{column}_offsets'] = offsets
+            columns[f'{column}_nulls'] = nulls
+
+        path = os.path.join(self.directory, name)
+        self._write_atomic(path, lambda f: np.savez_compressed(f, **columns))
+
+        entry = {
+            'file': name,
+            'rows': len(rows),
+            'bytes': os.path.getsize(path),
+            'first': [int(created_at[0]), int(ids[0])],
+            'last': [int(created_at[-1]), int(ids[-1])],
+            'min_id': int(ids.min()),
+            'max_id': int(ids.max()),
+            'users': {str(user): int(count) for user, count in zip(*np.unique(user_ids, return_counts=True))},
+            'from': rows[0]['created_at'].isoformat(),
+            'to': rows[-1]['created_at'].isoformat(),
+            'archived_at': datetime.utcnow().isoformat()
+        }
+        manifest = {'version': 1, 'segments': segments + [entry]}
+        self._write_atomic(self.manifest_path, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+        return entry
+
+    # --- Reading ---
+
+    def _segment(self, name):
+        """Cached segment reader (LRU over ARCHIVE_CACHE_SEGMENTS files)"""
+        with self._lock:
+            segment = self._cache.get(name)
+            if segment is None:
+                segment = _Segment(os.path.join(self.directory, name))
+                self._cache[name] = segment
+                while len(self._cache) > self.cache_segments:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(name)
+            return segment
+
+    def page(self, limit, before=None, user_id=None):
+        """
+        Newest-first archived Detections older than before=(created_at, id)
+        Segments are visited newest first and skipped when they hold no rows
+        of user_id or cannot beat the rows already picked. Returns
+        (detections, has_more)
+        """
+        before_key = (to_micros(before[0]), before[1]) if before else None
+        picked = []  # (created_at µs, id, file, index), newest first
+
+        for entry in sorted(self.segments(), key=lambda e: tuple(e['last']), reverse=True):
+            if not _has_user(entry, user_id) or (before_key and tuple(entry['first']) >= before_key):
+                continue
+            if len(picked) > limit and tuple(entry['last']) < picked[limit][:2]:
+                break
+
+            ids, user_ids, created_at = self._segment(entry['file']).columns('id', 'user_id', 'created_at')
+            mask = np.ones(len(ids), dtype=bool)
+            if user_id is not None:
+                mask &= user_ids == user_id
+            if before_key:
+                mask &= (created_at < before_key[0]) | ((created_at == before_key[0]) & (ids < before_key[1]))
+
+            # Rows are sorted oldest first - the newest matches are at the end
+            for index in np.flatnonzero(mask)[-(limit + 1):]:
+                picked.append((int(created_at[index]), int(ids[index]), entry['file'], int(index)))
+            picked.sort(reverse=True)
+            del picked[limit + 1:]
+
+        detections = [self._segment(name).detection(index) for _, _, name, index in picked[:limit]]
+        return detections, len(picked) > limit
+
+    def get(self, detection_id, user_id=None):
+        """Look up one archived Detection by id (and owner), or None"""
+        for entry in self.segments():
+            if not entry['min_id'] <= detection_id <= entry['max_id'] or not _has_user(entry, user_id):
+                continue
+            segment = self._segment(entry['file'])
+            ids, user_ids = segment.columns('id', 'user_id')
+            matches = np.flatnonzero(ids == detection_id)
+            if len(matches) and (user_id is None or user_ids[matches[0]] == user_id):
+                return segment.detection(int(matches[0]))
+        return None
+
+    def iter_matching(self, start=None, end=None, user_id=None, result=None, file_type=None):
+        """
+        Yield archived Detections oldest first, filtered like the export endpoint
+        (start <= created_at < end). Segments are read one at a time and not
+        cached, so memory stays flat for any archive size.
+        """
+        start_us = to_micros(start) if start else None
+        end_us = to_micros(end) if end else None
+
+        for entry in sorted(self.segments(), key=lambda e: tuple(e['first'])):
+            if start_us is not None and entry['last'][0] < start_us:
+                continue
+            if end_us is not None and entry['first'][0] >= end_us:
+                continue
+            if not _has_user(entry, user_id):
+                continue
+
+            segment = _Segment(os.path.join(self.directory, entry['file']))
+            ids, user_ids, created_at = segment.columns('id', 'user_id', 'created_at')
+            mask = np.ones(len(ids), dtype=bool)
+            if start_us is not None:
+                mask &= created_at >= start_us
+            if end_us is not None:
+                mask &= created_at < end_us
+            if user_id is not None:
+                mask &= user_ids == user_id
+            if result is not None:
+                mask &= segment.values('result') == result
+            if file_type is not None:
+                mask &= segment.values('file_type') == file_type
+
+            for index in np.flatnonzero(mask):
+                yield segment.detection(int(index))
+
+    def iter_columns(self, *names):
+        """Yield the requested columns segment by segment (for counter rebuilds)"""
+        for entry in self.segments():
+            segment = self._segment(entry['file'])
+            yield [segment.values(name) for name in names]
+
+    def stats(self):
+        segments = self.segments()
+        return {
+            'segments': len(segments),
+            'rows': sum(entry['rows'] for entry in segments),
+            'bytes': sum(entry['bytes'] for entry in segments),
+            'oldest': segments[0]['from'] if segments else None,
+            'newest': max(entry['to'] for entry in segments) if segments else None
+        }
+
+
+def archive_directory(url):
+    """
+    Archive location for a database URL - Config.ARCHIVE_DIR if set, else
+    <name>-archive next to a SQLite file, else database/archive/<backend_host_port_db>
+    so archived rows never show up against another database
+    """
+    from config import Config, BASE_DIR
+
+    if Config.ARCHIVE_DIR:
+        return str(Config.ARCHIVE_DIR)
+
+    url = make_url(str(url))
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        return f'{os.path.splitext(os.path.abspath(url.database))[0]}-archive'
+
+    name = '_'.join(str(part) for part in (url.get_backend_name(), url.host, url.port, url.database) if part)
+    return str(BASE_DIR / 'database' / 'archive' / re.sub(r'[^\w.-]', '_', name))
+
+
+# Shared archives, one per directory (created on first use)
+ARCHIVES = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+def get_archive():
+    """Return the shared archive of the app's database (needs an app context)"""
+    from config import Config
+
+    directory = archive_directory(db.engine.url)
+    with _ARCHIVES_LOCK:
+        if directory not in ARCHIVES:
+            ARCHIVES[directory] = DetectionArchive(directory, Config.ARCHIVE_CACHE_SEGMENTS)
+        return ARCHIVES[directory]
+
+def _delete_live(ids):
+    """Delete archived ids from detection_history - a Core statement, so the counter hooks don't run"""
+    table = Detection.__table__
+    for start in range(0, len(ids), 500):
+        db.session.execute(table.delete().where(table.c.id.in_(ids[start:start + 500])))
+    db.session.commit()
+
+def archive_detections(older_than_days=None, now=None):
+    """
+    Move detections created more than older_than_days ago into new segments
+    Each segment is on disk and in the manifest before its rows are deleted,
+    and a run first re-deletes the newest segment's rows in case the previous
+    run stopped in between. Runs hold the archive lock from selecting rows to
+    deleting them, so concurrent runs never reuse a segment name or drop each
+    other's manifest entries. Returns the number of rows archived.
+    """
+    from config import Config
+
+    archive = get_archive()
+    days = Config.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+
+    with archive.lock():
+        db.session.commit()  # Read from a snapshot taken under the lock, after any earlier run
+        segments = archive.segments()
+        if segments:
+            (ids,) = archive._segment(segments[-1]['file']).columns('id')
+            _delete_live(ids.tolist())
+
+        table = Detection.__table__
+        referenced = select(AnalysisJob.detection_id).where(AnalysisJob.detection_id.isnot(None))
+        query = select(table)\
+            .where(table.c.created_at < cutoff, table.c.id.notin_(referenced))\
+            .order_by(table.c.created_at, table.c.id)\
+            .limit(Config.ARCHIVE_SEGMENT_ROWS)
+
+        archived = 0
+        while True:
+            rows = [row._mapping for row in db.session.execute(query)]
+            if not rows:
+                break
+            archive.append(rows)
+            _delete_live([row['id'] for row in rows])
+            archived += len(rows)
+
+    return archived
+
+def merge_archived(rows, next_cursor, limit, cursor=None, user_id=None, key=None, wrap=None):
+    """
+    Complete a keyset_page result with archived rows
+    The archive is only read when the live page ends at or before the newest
+    archived row. key maps a row to its Detection, wrap turns archived
+    Detections into rows (default: as is). Returns (rows, next_cursor).
+    """
+    from utils import decode_cursor, encode_cursor
+
+    key = key or (lambda row: row)
+    archive = get_archive()
+    newest = archive.newest_key(user_id)
+    if newest is None:
+        return rows, next_cursor
+
+    if next_cursor is not None and rows:
+        last = key(rows[-1])
+        if (to_micros(last.created_at), last.id) > newest:
+            return rows, next_cursor
+
+    archived, archive_has_more = archive.page(limit, decode_cursor(cursor) if cursor else None, user_id)
+    live_ids = {key(row).id for row in rows}
+    archived = [d for d in archived if d.id not in live_ids]  # Mid-archival duplicates
+    if wrap:
+        archived = wrap(archived)
+
+    merged = sorted(rows + archived, key=lambda row: (key(row).created_at, key(row).id), reverse=True)
+    has_more = len(merged) > limit or next_cursor is not None or archive_has_more
+    merged = merged[:limit]
+
+    if has_more and merged:
+        last = key(merged[-1])
+        return merged, encode_cursor(last.created_at, last.id)
+    return merged, None
+
+
+if __name__ == "__main__":
+    import sys
+    from flask import Flask
+    from config import config
+
+    # Minimal app - just the database, no model loading
+    app = Flask(__name__)
+    app.config.from_object(config['default'])
+    config['default'].init_app(app)
+    db.init_app(app)
+
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    with app.app_context():
+        db.create_all()
+        count = archive_detections(days)
+        stats = get_archive().stats()
+        print(f"✓ Archived {count} detections ({stats['segments']} segments, "
+              f"{stats['rows']} rows, {stats['bytes'] / 1024:.1f} KiB)")
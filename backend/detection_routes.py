@@ -1,46 +1,85 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from database import db
-from models import Detection
-from utils import verify_token, allowed_file, save_upload_file
+from models import Detection, AnalysisJob
+from utils import verify_token, allowed_file, save_upload_file, read_upload_file, retain_upload, keyset_page
+from preprocessing import decode_image, preprocess_image, preprocess_into, FrameBatch, INPUT_SHAPE
+from inference_engine import InferenceEngine
+from frame_sampler import sample_frames
+from video_scoring import coarse_to_fine_indices, sequential_decision
+from video_pipeline import PipelinedVideoAnalyzer, merge_stage_stats
+from video_timeline import open_timeline, score_timeline, summarize_timeline
+from analysis_tiers import resolve_tier, get_tier_backend, record_cost
+from user_stats import get_user_stats
+from etags import user_etag, revalidate, cache_headers
+from result_cache import get_result_cache
+from model_loader import MODEL_LOADER, get_model
+from video_jobs import get_job_runner, JobQueueFull
+from detection_writer import save_detection
+from detection_archive import get_archive, merge_archived
+from config import Config
+from concurrent.futures import ThreadPoolExecutor
 import os
+import json
 import time
 from datetime import datetime
 
 detection_bp = Blueprint('detection', __name__, url_prefix='/api/detection')
 
-# Placeholder for ML model (will be loaded when available)
-ML_MODEL = None
+# Shared micro-batching engine for image predictions (created on first use)
+INFERENCE_ENGINE = None
 
-def load_ml_model():
-    """Load ML model if available"""
-    global ML_MODEL
-    try:
-        from tensorflow.keras.models import load_model
-        from config import Config
-        model_path = Config.MODEL_PATH
-        if os.path.exists(str(model_path)):
-            ML_MODEL = load_model(str(model_path))
-            print(f"✓ ML Model loaded from {model_path}")
-            return True
-        else:
-            print(f"⚠ Warning: Model not found at {model_path}")
-            return False
-    except Exception as e:
-        print(f"⚠ Warning: Could not load ML model: {e}")
-        return False
+# Thread pool decoding multi-file uploads in parallel (created on first use)
+DECODE_POOL = None
 
-# Try to load model on startup
-load_ml_model()
+def _model_predict_batch(images):
+    """Run one forward pass over a batch and return one score per image"""
+    return MODEL_LOADER.model.predict(images)
+
+def get_inference_engine():
+    """Return the shared inference engine, creating it on first use"""
+    global INFERENCE_ENGINE
+    if INFERENCE_ENGINE is None:
+        INFERENCE_ENGINE = InferenceEngine(
+            _model_predict_batch,
+            max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=Config.INFERENCE_MAX_WAIT_MS,
+            timeout=Config.INFERENCE_TIMEOUT
+        )
+    return INFERENCE_ENGINE
 
-def predict_image(image_path):
+def predict_image(image_path, details=None, plan=None):
     """
     Predict if image is fake or real
     Returns: (result, confidence, processing_time)
+    If a details dict is passed it is filled with analysis metadata
+    plan: analysis plan from resolve_tier - defaults to the default tier
+    """
+    import cv2
+    from preprocessing import REDUCED_DECODE_FLAGS
+    plan = plan or resolve_tier()
+    flags = REDUCED_DECODE_FLAGS.get(plan.get('image_reduce', 1), cv2.IMREAD_COLOR)
+    return _predict_image(lambda: cv2.imread(image_path, flags), details, plan)
+
+def predict_image_bytes(data, details=None, plan=None):
+    """
+    Predict if an encoded image (raw upload bytes) is fake or real - no disk round-trip
+    Returns: (result, confidence, processing_time)
     """
+    plan = plan or resolve_tier()
+    return _predict_image(lambda: decode_image(data, plan.get('image_reduce', 1)), details, plan)
+
+def _predict_image(load_image, details=None, plan=None):
+    """Shared image prediction - load_image returns a BGR array"""
+    import numpy as np
+    
+    if details is None:
+        details = {}
+    plan = plan or resolve_tier()
     start_time = time.time()
     
     # If no model, return demo prediction
-    if ML_MODEL is None:
+    if get_model() is None:
+        details['fallback'] = True
         import random
         result = random.choice(['fake', 'real'])
         confidence = random.uniform(70, 95)
@@ -49,18 +88,16 @@ def predict_image(image_path):
     
     # Real ML prediction
     try:
-        import cv2
-        import numpy as np
-        
         # Load and preprocess image
-        image = cv2.imread(image_path)
-        image = cv2.resize(image, (224, 224))
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image = image.astype(np.float32) / 255.0
-        image = np.expand_dims(image, axis=0)
+        image = preprocess_image(load_image())
         
-        # Predict
-        prediction = ML_MODEL.predict(image, verbose=0)[0][0]
+        # Predict - batched with other concurrent requests, unless the tier has its own backend
+        backend = get_tier_backend(plan)
+        if backend is None:
+            prediction = get_inference_engine().predict(image)
+        else:
+            prediction = float(backend.predict(np.expand_dims(image, axis=0))[0])
+        details['backend'] = plan['backend'] if backend is not None else Config.INFERENCE_BACKEND
         
         # Convert to result
         if prediction > 0.5:
@@ -76,21 +113,97 @@ def predict_image(image_path):
     except Exception as e:
         print(f"Prediction error: {e}")
         # Fallback to demo prediction
+        details['fallback'] = True
         import random
         result = random.choice(['fake', 'real'])
         confidence = random.uniform(70, 95)
         processing_time = time.time() - start_time
         return result, confidence, processing_time
 
-def predict_video(video_path, num_frames=10):
+def _score_frames(cap, frame_indices, details, predict_fn=_model_predict_batch, pipelined=None):
+    """Score the given frames - pipelined decode/inference overlap when enabled"""
+    if pipelined is None:
+        pipelined = Config.VIDEO_PIPELINE_ENABLED
+    
+    if pipelined:
+        analyzer = PipelinedVideoAnalyzer(
+            predict_fn,
+            batch_size=Config.VIDEO_PIPELINE_BATCH_SIZE,
+            frame_queue_size=Config.VIDEO_PIPELINE_FRAME_QUEUE_SIZE,
+            batch_buffers=Config.VIDEO_PIPELINE_BATCH_BUFFERS,
+            max_gap=Config.FRAME_SAMPLER_MAX_GAP
+        )
+        predictions, stats = analyzer.run(cap, frame_indices)
+        merge_stage_stats(details.setdefault('stage_timings', {}), stats)
+        return predictions
+    
+    # Serial: extract frames into one preallocated batch
+    frames = FrameBatch(len(frame_indices))
+    
+    for idx, frame in sample_frames(cap, frame_indices, Config.FRAME_SAMPLER_MAX_GAP):
+        # Preprocess frame straight into its batch slot
+        frames.add(frame)
+    
+    # Predict - one forward pass per chunk
+    chunk_size = max(1, Config.VIDEO_MAX_CHUNK_SIZE)
+    batch = frames.view()
+    predictions = []
+    for start in range(0, len(batch), chunk_size):
+        predictions.extend(predict_fn(batch[start:start + chunk_size]))
+    
+    return predictions
+
+def _score_fixed(cap, total_frames, num_frames, details, predict_fn=_model_predict_batch):
+    """Score num_frames frames spread evenly over the video"""
+    import numpy as np
+    
+    frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+    predictions = _score_frames(cap, frame_indices, details, predict_fn)
+    
+    details['sampling'] = 'fixed'
+    return predictions
+
+def _score_adaptive(cap, total_frames, details, predict_fn=_model_predict_batch):
+    """Score frames coarse-to-fine in rounds until the sequential test is decisive"""
+    order = coarse_to_fine_indices(total_frames, Config.VIDEO_ADAPTIVE_MAX_FRAMES)
+    round_size = max(1, Config.VIDEO_ADAPTIVE_ROUND_SIZE)
+    predictions = []
+    decision = None
+    
+    for start in range(0, len(order), round_size):
+        # Each round's indices lie between earlier ones, so the sampler seeks back
+        # to the round's first index from wherever the last round stopped. A round
+        # is smaller than a pipeline batch - scored serially, no threads per round
+        round_indices = order[start:start + round_size]
+        predictions.extend(_score_frames(cap, round_indices, details, predict_fn, pipelined=False))
+        
+        decision = sequential_decision(predictions, Config.VIDEO_ADAPTIVE_Z, round_size)
+        if decision is not None:
+            break
+    
+    details['sampling'] = 'adaptive'
+    details['early_exit'] = decision is not None and len(predictions) < len(order)
+    return predictions
+
+def predict_video(video_path, num_frames=None, details=None, sampling=None, plan=None):
     """
     Predict if video is fake or real by analyzing frames
     Returns: (result, confidence, processing_time)
+    If a details dict is passed it is filled with analysis metadata
+    plan: analysis plan from resolve_tier - defaults to the default tier
+    num_frames / sampling override the plan: 'fixed' (num_frames evenly spaced)
+    or 'adaptive' - the plan's None means Config.VIDEO_SAMPLING_MODE
     """
+    if details is None:
+        details = {}
+    plan = plan or resolve_tier()
+    num_frames = num_frames or plan['frames']
+    sampling = sampling or plan['sampling']
     start_time = time.time()
     
     # If no model, return demo prediction
-    if ML_MODEL is None:
+    if get_model() is None:
+        details['fallback'] = True
         import random
         result = random.choice(['fake', 'real'])
         confidence = random.uniform(70, 95)
@@ -102,33 +215,30 @@ def predict_video(video_path, num_frames=10):
         import cv2
         import numpy as np
         
-        # Open video
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # Extract frames
-        frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
-        predictions = []
+        # Tier backend, or the loaded model
+        backend = get_tier_backend(plan)
+        predict_fn = backend.predict if backend is not None else _model_predict_batch
+        backend_name = plan['backend'] if backend is not None else Config.INFERENCE_BACKEND
         
-        for idx in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-            ret, frame = cap.read()
+        # Open video - released even when decoding or preprocessing fails
+        cap = cv2.VideoCapture(video_path)
+        try:
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             
-            if ret:
-                # Preprocess frame
-                frame = cv2.resize(frame, (224, 224))
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame = frame.astype(np.float32) / 255.0
-                frame = np.expand_dims(frame, axis=0)
-                
-                # Predict
-                pred = ML_MODEL.predict(frame, verbose=0)[0][0]
-                predictions.append(pred)
-        
-        cap.release()
+            if (sampling or Config.VIDEO_SAMPLING_MODE) == 'adaptive':
+                predictions = _score_adaptive(cap, total_frames, details, predict_fn)
+            else:
+                predictions = _score_fixed(cap, total_frames, num_frames, details, predict_fn)
+        finally:
+            cap.release()
+        details['frames_used'] = len(predictions)
+        details['backend'] = backend_name
+        
+        # Feed the cost model used to size latency-budgeted requests
+        record_cost(backend_name, len(predictions), time.time() - start_time, details['sampling'])
         
         # Aggregate predictions
-        avg_prediction = np.mean(predictions)
+        avg_prediction = float(np.mean(predictions))
         
         if avg_prediction > 0.5:
             result = 'fake'
@@ -143,12 +253,81 @@ def predict_video(video_path, num_frames=10):
     except Exception as e:
         print(f"Video prediction error: {e}")
         # Fallback to demo prediction
+        details['fallback'] = True
         import random
         result = random.choice(['fake', 'real'])
         confidence = random.uniform(70, 95)
         processing_time = time.time() - start_time
         return result, confidence, processing_time
 
+def caches_plan(plan):
+    """
+    Whether a plan's verdicts go through the result cache - only the default
+    tier's: the cache key is (content, model version), so a verdict from another
+    tier or a budget would be served for (or mask a re-scan at) a different one
+    """
+    return plan is None or plan['tier'] == Config.ANALYSIS_DEFAULT_TIER
+
+def lookup_cached_result(content_hash, plan=None):
+    """Return the cached verdict for an upload under the loaded model, or None"""
+    if not Config.RESULT_CACHE_ENABLED or not MODEL_LOADER.is_ready() or not caches_plan(plan):
+        return None
+    return get_result_cache().get(content_hash, MODEL_LOADER.version)
+
+def store_cached_result(content_hash, file_type, file_path, result, confidence, details, plan=None):
+    """Cache a fresh verdict - demo, fallback, other-backend and non-default tier predictions are never cached"""
+    if not Config.RESULT_CACHE_ENABLED or not MODEL_LOADER.is_ready() or details.get('fallback'):
+        return
+    if not caches_plan(plan):
+        return
+    if details.get('backend', Config.INFERENCE_BACKEND) != Config.INFERENCE_BACKEND:
+        return
+    get_result_cache().put(content_hash, MODEL_LOADER.version, file_type, file_path, result, confidence)
+
+def reuse_cached_file(cached, file_path):
+    """Drop the duplicate upload and point at the first stored copy when it still exists"""
+    cached_path = cached.get('file_path')
+    if cached_path and cached_path != file_path and os.path.exists(cached_path):
+        os.remove(file_path)
+        return cached_path
+    return file_path
+
+def request_plan():
+    """
+    Analysis plan for the request's tier or budget_ms (query string or form field)
+    Raises ValueError for an invalid tier or budget
+    """
+    tier = request.args.get('tier', request.form.get('tier'))
+    budget_ms = request.args.get('budget_ms', request.form.get('budget_ms'))
+    if budget_ms is not None:
+        try:
+            budget_ms = float(budget_ms)
+        except ValueError:
+            raise ValueError('budget_ms must be a number')
+    return resolve_tier(tier, budget_ms)
+
+def analysis_cost(plan, details, processing_time):
+    """Tier and actual cost recorded in extra_data"""
+    cost = {
+        'tier': plan['tier'],
+        'cost': {
+            'elapsed_ms': round(processing_time * 1000, 1),
+            'frames': details.get('frames_used', 1),
+            'backend': details.get('backend')
+        }
+    }
+    if 'budget_ms' in plan:
+        cost['budget_ms'] = plan['budget_ms']
+        cost['predicted_ms'] = plan.get('predicted_ms')
+    return cost
+
+def wants_async_job():
+    """Check the request's async flag (query string or form field)"""
+    value = request.args.get('async', request.form.get('async'))
+    if value is None:
+        return Config.VIDEO_ASYNC_BY_DEFAULT
+    return value.lower() in ('1', 'true', 'yes')
+
 @detection_bp.route('/upload-image', methods=['POST'])
 def upload_image():
     """Upload and analyze image"""
@@ -170,11 +349,35 @@ def upload_image():
         if not allowed_file(file.filename, 'image'):
             return jsonify({'error': 'Invalid file type. Only images allowed.'}), 400
         
-        # Save file
-        file_path = save_upload_file(file, 'images')
+        # Analysis tier or latency budget
+        try:
+            plan = request_plan()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Read into memory - the image is decoded from these bytes, not from disk
+        start_time = time.time()
+        data, content_hash = read_upload_file(file)
+        
+        # Identical upload already analyzed by this model (at this tier) - reuse its verdict
+        cached = lookup_cached_result(content_hash, plan)
+        if cached:
+            result, confidence = cached['result'], cached['confidence']
+            processing_time = time.time() - start_time
+            extra_data = {'content_hash': content_hash, 'cache_hit': True}
+            
+            file_path = cached.get('file_path')
+            if not file_path or not os.path.exists(file_path):
+                file_path = retain_upload(data, file.filename, 'images', result)
         
-        # Predict
-        result, confidence, processing_time = predict_image(file_path)
+        else:
+            # Predict first, then persist the original off the hot path (per retention policy)
+            details = {}
+            result, confidence, processing_time = predict_image_bytes(data, details=details, plan=plan)
+            file_path = retain_upload(data, file.filename, 'images', result)
+            store_cached_result(content_hash, 'image', file_path, result, confidence, details, plan)
+            extra_data = {'content_hash': content_hash, 'cache_hit': False,
+                          **analysis_cost(plan, details, processing_time)}
         
         # Save to database - CHANGED: metadata → extra_data
         detection = Detection(
@@ -185,18 +388,175 @@ def upload_image():
             result=result,
             confidence=confidence,
             processing_time=processing_time,
-            extra_data=None  # Changed from metadata
+            extra_data=json.dumps(extra_data)  # Changed from metadata
         )
         
-        db.session.add(detection)
-        db.session.commit()
+        detection_id = save_detection(detection)
         
         return jsonify({
             'message': 'Image analyzed successfully',
             'result': result,
             'confidence': round(confidence, 2),
             'processing_time': round(processing_time, 2),
-            'detection_id': detection.id
+            'detection_id': detection_id,
+            'cached': extra_data['cache_hit'],
+            'tier': plan['tier']
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def get_decode_pool():
+    """Return the shared image decoding pool, creating it on first use"""
+    global DECODE_POOL
+    if DECODE_POOL is None:
+        DECODE_POOL = ThreadPoolExecutor(
+            max_workers=max(1, Config.BATCH_UPLOAD_DECODE_WORKERS),
+            thread_name_prefix='image-decode'
+        )
+    return DECODE_POOL
+
+def predict_image_batch(datas):
+    """
+    Predict many encoded images - decoded in parallel, scored in batches
+    Returns one (result, confidence) or an Exception per input, in order
+    """
+    import numpy as np
+    
+    if get_model() is None:
+        import random
+        return [(random.choice(['fake', 'real']), random.uniform(70, 95)) for _ in datas]
+    
+    # Decode and resize straight into one preallocated uint8 batch (OpenCV releases the GIL)
+    images = np.empty((len(datas),) + INPUT_SHAPE, dtype=np.uint8)
+    outcomes = list(get_decode_pool().map(
+        lambda i: _decode_into(datas[i], images[i]), range(len(datas))
+    ))
+    decoded = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    
+    # Predict - one forward pass per chunk of decoded images
+    chunk_size = max(1, Config.BATCH_UPLOAD_INFERENCE_SIZE)
+    for start in range(0, len(decoded), chunk_size):
+        rows = decoded[start:start + chunk_size]
+        try:
+            scores = _model_predict_batch(images[rows])
+            for i, score in zip(rows, scores):
+                score = float(score)
+                outcomes[i] = ('fake', score * 100) if score > 0.5 else ('real', (1 - score) * 100)
+        except Exception as e:
+            print(f"Batch prediction error: {e}")
+            for i in rows:
+                outcomes[i] = e
+    
+    return outcomes
+
+def _decode_into(data, out):
+    """Decode and preprocess one image into its batch slot - returns the error, if any"""
+    try:
+        preprocess_into(decode_image(data), out)
+        return None
+    except Exception as e:
+        return e
+
+@detection_bp.route('/upload-batch', methods=['POST'])
+def upload_batch():
+    """Upload and analyze many images in one request - always at the default analysis tier"""
+    user = verify_token()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        # Batches share one forward pass per chunk - other tiers are not supported here
+        try:
+            plan = request_plan()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if plan['tier'] != Config.ANALYSIS_DEFAULT_TIER:
+            return jsonify({'error': f"upload-batch always runs the '{Config.ANALYSIS_DEFAULT_TIER}' tier - "
+                                     f"upload files one by one for other tiers or a budget"}), 400
+        
+        # Check if files are present (repeated 'files' fields, or 'file')
+        files = request.files.getlist('files') or request.files.getlist('file')
+        if not files:
+            return jsonify({'error': 'No files uploaded'}), 400
+        
+        if len(files) > Config.BATCH_UPLOAD_MAX_FILES:
+            return jsonify({'error': f'Too many files. Maximum is {Config.BATCH_UPLOAD_MAX_FILES} per request.'}), 400
+        
+        start_time = time.time()
+        results = [None] * len(files)
+        uploads = []  # (position, filename, bytes, content_hash) still to predict
+        
+        for position, file in enumerate(files):
+            # Per-file validation - a bad file is reported, not fatal
+            if file.filename == '':
+                results[position] = {'file_name': '', 'error': 'No file selected'}
+            elif not allowed_file(file.filename, 'image'):
+                results[position] = {'file_name': file.filename, 'error': 'Invalid file type. Only images allowed.'}
+            else:
+                data, content_hash = read_upload_file(file)
+                uploads.append((position, file.filename, data, content_hash))
+        
+        # Reuse cached verdicts, predict the rest in one batched pass
+        cached = [lookup_cached_result(content_hash) for _, _, _, content_hash in uploads]
+        to_predict = [upload for upload, hit in zip(uploads, cached) if not hit]
+        outcomes = iter(predict_image_batch([data for _, _, data, _ in to_predict]))
+        fallback = get_model() is None
+        
+        detections = []
+        for (position, filename, data, content_hash), hit in zip(uploads, cached):
+            if hit:
+                result, confidence = hit['result'], hit['confidence']
+                file_path = hit.get('file_path')
+                if not file_path or not os.path.exists(file_path):
+                    file_path = retain_upload(data, filename, 'images', result)
+            else:
+                outcome = next(outcomes)
+                if isinstance(outcome, Exception):
+                    results[position] = {'file_name': filename, 'error': str(outcome)}
+                    continue
+                result, confidence = outcome
+                file_path = retain_upload(data, filename, 'images', result)
+                store_cached_result(content_hash, 'image', file_path, result, confidence, {'fallback': fallback})
+            
+            detection = Detection(
+                user_id=user.id,
+                file_name=filename,
+                file_type='image',
+                file_path=file_path,
+                result=result,
+                confidence=confidence,
+                extra_data=json.dumps({'content_hash': content_hash, 'cache_hit': bool(hit), 'batch': True})
+            )
+            detections.append((position, detection))
+        
+        # Processing time is shared evenly - the images were analyzed together
+        processing_time = time.time() - start_time
+        for _, detection in detections:
+            detection.processing_time = processing_time / len(detections)
+        
+        # Save to database - all rows in one transaction
+        db.session.add_all([detection for _, detection in detections])
+        db.session.commit()
+        
+        for position, detection in detections:
+            results[position] = {
+                'file_name': detection.file_name,
+                'result': detection.result,
+                'confidence': round(detection.confidence, 2),
+                'detection_id': detection.id,
+                'cached': json.loads(detection.extra_data)['cache_hit']
+            }
+        
+        failed = sum(1 for r in results if 'error' in r)
+        return jsonify({
+            'message': f'{len(detections)} of {len(files)} images analyzed successfully',
+            'processed': len(detections),
+            'failed': failed,
+            'processing_time': round(processing_time, 2),
+            'results': results
         }), 200
         
     except Exception as e:
@@ -225,11 +585,46 @@ def upload_video():
         if not allowed_file(file.filename, 'video'):
             return jsonify({'error': 'Invalid file type. Only videos allowed.'}), 400
         
-        # Save file
-        file_path = save_upload_file(file, 'videos')
+        # Analysis tier or latency budget
+        try:
+            plan = request_plan()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Save file (hashed while it streams to disk)
+        start_time = time.time()
+        file_path, content_hash = save_upload_file(file, 'videos', with_hash=True)
+        
+        # Identical upload already analyzed by this model (at this tier) - reuse its verdict
+        cached = lookup_cached_result(content_hash, plan)
+        if cached:
+            file_path = reuse_cached_file(cached, file_path)
+            result, confidence = cached['result'], cached['confidence']
+            processing_time = time.time() - start_time
+            extra_data = {'content_hash': content_hash, 'cache_hit': True}
+        
+        # Job mode - analyze in the background and return a job id at once
+        elif wants_async_job() and get_job_runner() is not None:
+            try:
+                job = get_job_runner().create_job(user.id, file.filename, file_path, content_hash,
+                                                  tier=plan['tier'] if plan['tier'] != 'budget' else None)
+            except JobQueueFull as e:
+                return jsonify({'error': str(e)}), 503
+            
+            return jsonify({
+                'message': 'Video queued for analysis',
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': f'/api/detection/jobs/{job.id}'
+            }), 202
         
-        # Predict
-        result, confidence, processing_time = predict_video(file_path)
+        else:
+            # Predict
+            details = {}
+            result, confidence, processing_time = predict_video(file_path, details=details, plan=plan)
+            store_cached_result(content_hash, 'video', file_path, result, confidence, details, plan)
+            extra_data = {'content_hash': content_hash, 'cache_hit': False, **details,
+                          **analysis_cost(plan, details, processing_time)}
         
         # Save to database - CHANGED: metadata → extra_data
         detection = Detection(
@@ -240,18 +635,19 @@ def upload_video():
             result=result,
             confidence=confidence,
             processing_time=processing_time,
-            extra_data=None  # Changed from metadata
+            extra_data=json.dumps(extra_data)  # Changed from metadata
         )
         
-        db.session.add(detection)
-        db.session.commit()
+        detection_id = save_detection(detection)
         
         return jsonify({
             'message': 'Video analyzed successfully',
             'result': result,
             'confidence': round(confidence, 2),
             'processing_time': round(processing_time, 2),
-            'detection_id': detection.id
+            'detection_id': detection_id,
+            'cached': extra_data['cache_hit'],
+            'tier': plan['tier']
         }), 200
         
     except Exception as e:
@@ -259,6 +655,155 @@ def upload_video():
         print(f"Error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _demo_predict_batch(images):
+    """Random scores for demo mode (no model loaded)"""
+    import random
+    return [random.random() for _ in range(len(images))]
+
+def format_stream_event(event, sse=False):
+    """Encode one streamed event as an NDJSON line or a Server-Sent Event"""
+    payload = json.dumps(event)
+    if sse:
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + '\n'
+
+@detection_bp.route('/upload-video-timeline', methods=['POST'])
+def upload_video_timeline():
+    """Upload a video and stream per-segment scores as each segment is analyzed"""
+    user = verify_token()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # Check if file is present
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    # Check if allowed file type
+    if not allowed_file(file.filename, 'video'):
+        return jsonify({'error': 'Invalid file type. Only videos allowed.'}), 400
+    
+    # NDJSON by default, Server-Sent Events on request
+    sse = request.args.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+    segment_seconds = request.args.get('segment_seconds', Config.VIDEO_TIMELINE_SEGMENT_SECONDS, type=float)
+    segment_seconds = max(0.5, segment_seconds)
+    
+    # Save file before the response starts - the upload stream is gone afterwards
+    start_time = time.time()
+    try:
+        file_path, content_hash = save_upload_file(file, 'videos', with_hash=True)
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': str(e)}), 500
+    
+    file_name = file.filename
+    user_id = user.id
+    
+    def generate():
+        cap = None
+        try:
+            model_ready = get_model() is not None
+            cap, fps, segments, segment_length = open_timeline(
+                file_path, segment_seconds,
+                Config.VIDEO_TIMELINE_FRAMES_PER_SEGMENT,
+                Config.VIDEO_TIMELINE_MAX_SEGMENTS
+            )
+            
+            yield format_stream_event({
+                'type': 'meta',
+                'segments': len(segments),
+                'segment_seconds': segment_length,
+                'duration': round(segments[-1][1] / fps, 2) if segments else 0
+            }, sse)
+            
+            # Score and stream each segment as soon as its frames are decoded
+            predict_fn = _model_predict_batch if model_ready else _demo_predict_batch
+            segment_results = []
+            for segment in score_timeline(cap, segments, predict_fn, fps, Config.FRAME_SAMPLER_MAX_GAP):
+                segment_results.append(segment)
+                yield format_stream_event({'type': 'segment', **segment}, sse)
+            
+            cap.release()
+            cap = None
+            
+            result, confidence, summary = summarize_timeline(segment_results, segment_length)
+            if result is None:
+                yield format_stream_event({'type': 'error', 'error': 'No frames could be decoded'}, sse)
+                return
+            
+            processing_time = time.time() - start_time
+            extra_data = {'content_hash': content_hash, 'cache_hit': False, **summary}
+            if not model_ready:
+                extra_data['fallback'] = True
+            
+            # Save to database
+            detection = Detection(
+                user_id=user_id,
+                file_name=file_name,
+                file_type='video',
+                file_path=file_path,
+                result=result,
+                confidence=confidence,
+                processing_time=processing_time,
+                extra_data=json.dumps(extra_data)
+            )
+            
+            detection_id = save_detection(detection)
+            
+            yield format_stream_event({
+                'type': 'done',
+                'result': result,
+                'confidence': round(confidence, 2),
+                'processing_time': round(processing_time, 2),
+                'detection_id': detection_id,
+                'fake_segments': summary['timeline']['fake_segments']
+            }, sse)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"Timeline error: {e}")
+            yield format_stream_event({'type': 'error', 'error': str(e)}, sse)
+        finally:
+            if cap is not None:
+                cap.release()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@detection_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get background analysis job status"""
+    user = verify_token()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        job = AnalysisJob.query.filter_by(id=job_id, user_id=user.id).first()
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        job_data = job.to_dict()
+        if job.detection_id:
+            job_data['detection_url'] = f'/api/detection/detection/{job.detection_id}'
+            detection = Detection.query.get(job.detection_id)
+            if detection:
+                job_data['detection'] = detection.to_dict()
+        
+        return jsonify({
+            'job': job_data
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @detection_bp.route('/history', methods=['GET'])
 def get_history():
     """Get detection history for current user"""
@@ -266,21 +811,29 @@ def get_history():
     if not user:
         return jsonify({'error': 'Unauthorized'}), 401
     
+    etag = revalidate(user_etag(user.id))
+    
     try:
-        # Get pagination parameters
-        limit = request.args.get('limit', 20, type=int)
-        page = request.args.get('page', 1, type=int)
+        # Keyset pagination - pass next_cursor back as ?cursor= for the next page
+        limit = min(max(1, request.args.get('limit', 20, type=int)), 100)
+        cursor = request.args.get('cursor')
+        
+        # Query detections (idx_detection_user_created)
+        detections, next_cursor = keyset_page(
+            Detection.query.filter_by(user_id=user.id),
+            Detection.created_at, Detection.id, limit, cursor
+        )
         
-        # Query detections
-        detections = Detection.query.filter_by(user_id=user.id)\
-            .order_by(Detection.created_at.desc())\
-            .limit(limit)\
-            .all()
+        # Older pages continue into the archive
+        detections, next_cursor = merge_archived(detections, next_cursor, limit, cursor, user_id=user.id)
         
         return jsonify({
-            'history': [d.to_dict() for d in detections]
-        }), 200
+            'history': [d.to_dict() for d in detections],
+            'next_cursor': next_cursor
+        }), 200, cache_headers(etag)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -291,15 +844,19 @@ def get_detection(detection_id):
     if not user:
         return jsonify({'error': 'Unauthorized'}), 401
     
+    etag = revalidate(user_etag(user.id))
+    
     try:
         detection = Detection.query.filter_by(id=detection_id, user_id=user.id).first()
+        if not detection:
+            detection = get_archive().get(detection_id, user_id=user.id)
         
         if not detection:
             return jsonify({'error': 'Detection not found'}), 404
         
         return jsonify({
             'detection': detection.to_dict()
-        }), 200
+        }), 200, cache_headers(etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -311,23 +868,13 @@ def get_stats():
     if not user:
         return jsonify({'error': 'Unauthorized'}), 401
     
+    etag = revalidate(user_etag(user.id))
+    
     try:
-        total = Detection.query.filter_by(user_id=user.id).count()
-        fake = Detection.query.filter_by(user_id=user.id, result='fake').count()
-        real = Detection.query.filter_by(user_id=user.id, result='real').count()
-        
-        # Calculate average confidence
-        detections = Detection.query.filter_by(user_id=user.id).all()
-        avg_confidence = sum(d.confidence for d in detections) / len(detections) if detections else 0
-        
+        # One primary-key lookup - counters are updated with every insert
         return jsonify({
-            'stats': {
-                'total_detections': total,
-                'fake_count': fake,
-                'real_count': real,
-                'avg_confidence': round(avg_confidence, 2)
-            }
-        }), 200
+            'stats': get_user_stats(user.id).to_dict()
+        }), 200, cache_headers(etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Write-behind Detection inserts
+Upload requests hand their Detection rows to a background writer, which
+commits them in groups - one transaction (and one fsync) per batch instead
+of one per request. A batch is committed once it reaches max_batch_size rows
+or its first row has waited max_wait_ms. close() flushes whatever is queued.
+"""
+
+import atexit
+import threading
+import queue
+import time
+from concurrent.futures import Future
+from database import db
+
+_STOP = object()
+
+
+class DetectionWriter:
+    """Background group-commit writer for Detection rows"""
+
+    def __init__(self, app, max_batch_size=64, max_wait_ms=2):
+        """
+        Args:
+            app: Flask app (the writer thread runs in its app context)
+            max_batch_size: Most rows committed in one transaction
+            max_wait_ms: How long the first queued row waits for company
+        """
+        self.app = app
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Group commit statistics
+        self._batches = 0
+        self._rows = 0
+        self._failed = 0
+
+    def start(self):
+        """Start the writer thread if it is not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='detection-writer', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, detection):
+        """Queue a new (transient) Detection - returns a Future for its id, set once committed"""
+        if self._closed:
+            raise RuntimeError('Detection writer is closed')
+        self.start()
+        future = Future()
+        self._queue.put((detection, future))
+        return future
+
+    def close(self, timeout=10):
+        """Flush everything queued, then stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _collect_batch(self):
+        """Block for the first row, then gather more until full or timed out"""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _commit(self, batch):
+        """Insert a batch in one transaction - returns the new ids"""
+        detections = [detection for detection, _ in batch]
+        db.session.add_all(detections)
+        db.session.flush()
+        ids = [detection.id for detection in detections]
+        db.session.commit()
+        return ids
+
+    def _write(self, batch):
+        """Commit a batch, falling back to row-by-row so one bad row fails alone"""
+        try:
+            ids = self._commit(batch)
+            for (_, future), detection_id in zip(batch, ids):
+                future.set_result(detection_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Detection group commit failed, retrying rows one by one: {e}")
+            for detection, future in batch:
+                try:
+                    future.set_result(self._commit([(detection, future)])[0])
+                except Exception as row_error:
+                    db.session.rollback()
+                    future.set_exception(row_error)
+                    with self._lock:
+                        self._failed += 1
+        finally:
+            db.session.remove()
+
+        with self._lock:
+            self._batches += 1
+            self._rows += len(batch)
+
+    def _run(self):
+        """Group commit loop - drains the queue before exiting on close()"""
+        while True:
+            batch, stopping = self._collect_batch()
+            if batch:
+                with self.app.app_context():
+                    self._write(batch)
+            if stopping:
+                break
+
+        # Rows queued behind the stop marker
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            with self.app.app_context():
+                self._write(leftover)
+
+    def stats(self):
+        """Report group commit sizes, for tuning the batch size and wait window"""
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': round(self.max_wait * 1000, 2),
+                'batches': self._batches,
+                'rows': self._rows,
+                'failed_rows': self._failed,
+                'avg_batch_size': round(self._rows / self._batches, 2) if self._batches else 0,
+                'queue_depth': self._queue.qsize()
+            }
+
+
+# Shared writer (created by init_detection_writer when write-behind is enabled)
+DETECTION_WRITER = None
+
+def init_detection_writer(app):
+    """Create the shared writer and flush it at interpreter exit"""
+    global DETECTION_WRITER
+    from config import Config
+
+    if Config.DETECTION_WRITE_MODE == 'sync':
+        return None
+
+    DETECTION_WRITER = DetectionWriter(
+        app,
+        max_batch_size=Config.DETECTION_WRITE_MAX_BATCH,
+        max_wait_ms=Config.DETECTION_WRITE_MAX_WAIT_MS
+    )
+    DETECTION_WRITER.start()
+    atexit.register(DETECTION_WRITER.close)
+    return DETECTION_WRITER
+
+def get_detection_writer():
+    """Return the shared writer (None in sync mode)"""
+    return DETECTION_WRITER
+
+def save_detection(detection, timeout=None):
+    """
+    Persist a new Detection according to Config.DETECTION_WRITE_MODE
+    - 'sync':  commit in the calling request (default)
+    - 'group': hand to the writer and wait for its group commit - same durability, higher throughput
+    - 'async': hand to the writer and return at once - lowest latency, but rows still
+               queued are lost if the process dies without a clean shutdown
+    Returns the new id (None in 'async' mode)
+    """
+    from config import Config
+
+    writer = get_detection_writer()
+    if writer is None:
+        db.session.add(detection)
+        db.session.commit()
+        return detection.id
+
+    # Commit whatever the request has pending (e.g. its result cache row) first -
+    # SQLite allows one writer, so waiting on the writer thread while this
+    # session holds a write transaction would deadlock until the busy timeout
+    db.session.commit()
+
+    future = writer.submit(detection)
+    if Config.DETECTION_WRITE_MODE == 'async':
+        return None
+    return future.result(timeout=timeout)
@@ -0,0 +1,72 @@
+"""
+Conditional GET support
+Each cacheable response carries an ETag built from change counters in the
+data_versions table. The counters are bumped in the same flush that changes
+the underlying rows, so a route can compare If-None-Match against one
+primary-key lookup and answer 304 before loading anything else.
+
+Scopes:
+    user:<id>    - that user's detections (history, stats, detail)
+    detections   - any detection (admin views)
+    users        - any user row (admin views)
+"""
+
+from flask import request, abort, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from database import db, increment_counters
+from models import Detection, User, DataVersion
+
+
+def _bump_versions(session, flush_context, instances):
+    """before_flush hook - bump the counters of every scope this flush changes"""
+    scopes = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Detection):
+            scopes.add('detections')
+            if obj.user_id is not None:
+                scopes.add(f'user:{obj.user_id}')
+        elif isinstance(obj, User) and (obj in session.new or session.is_modified(obj) or obj in session.deleted):
+            scopes.add('users')
+
+    if not scopes:
+        return
+
+    # Connection-level statements: same transaction, no re-entrant autoflush
+    connection = session.connection()
+    for scope in sorted(scopes):
+        increment_counters(connection, DataVersion.__table__, {'scope': scope}, {'version': 1})
+
+def user_etag(user_id):
+    """ETag for a user's own views - changes whenever one of their detections does"""
+    version = db.session.query(DataVersion.version).filter_by(scope=f'user:{user_id}').scalar() or 0
+    return f'u{user_id}-{version}'
+
+def admin_etag():
+    """ETag for admin views - changes with any detection or user row"""
+    versions = dict(db.session.query(DataVersion.scope, DataVersion.version)
+                    .filter(DataVersion.scope.in_(['detections', 'users'])).all())
+    return f"a{versions.get('detections', 0)}-{versions.get('users', 0)}"
+
+def revalidate(etag):
+    """
+    Answer 304 at once if the client's copy (If-None-Match) is still etag,
+    before the route loads any rows - otherwise return etag for cache_headers
+    """
+    if etag in request.if_none_match:
+        abort(make_response('', 304, cache_headers(etag)))
+    return etag
+
+def cache_headers(etag):
+    """Headers for a revalidate-every-time, per-user cacheable response"""
+    return {
+        'ETag': f'"{etag}"',
+        'Cache-Control': 'private, no-cache',
+        'Vary': 'Authorization'
+    }
+
+def init_etags():
+    """Register the version hook (call once at startup)"""
+    if not event.contains(Session, 'before_flush', _bump_versions):
+        event.listen(Session, 'before_flush', _bump_versions)
@@ -0,0 +1,210 @@
+"""
+Serving Model Export Script
+Converts ml_models/cnn_model.h5 into the models used for serving:
+- cnn_model_uint8.h5: same weights, uint8 input with an in-graph Rescaling layer
+- TFLite float16 (built from the uint8-input model) and post-training int8 models
+and reports accuracy drift and CPU latency against the float32 Keras model
+"""
+
+import os
+import json
+import time
+import random
+import numpy as np
+import cv2
+import tensorflow as tf
+from tensorflow.keras import layers
+from tensorflow.keras.models import load_model
+from config import Config
+from inference_backends import TFLiteBackend
+from preprocessing import preprocess_image, to_float
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def load_image(image_path):
+    """Load and preprocess an image exactly like predict_image does (uint8 RGB)"""
+    return preprocess_image(cv2.imread(image_path))
+
+def list_images(data_dir):
+    """
+    Return [(path, label)] for data_dir/<class>/* images
+    Labels follow flow_from_directory (classes sorted alphabetically), as in training
+    """
+    classes = sorted(d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d)))
+    samples = []
+
+    for label, cls in enumerate(classes):
+        cls_dir = os.path.join(data_dir, cls)
+        samples.extend(
+            (os.path.join(cls_dir, f), label)
+            for f in sorted(os.listdir(cls_dir))
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    return samples
+
+def representative_dataset(calibration_dir, num_samples=200):
+    """Calibration generator for int8 quantization"""
+    samples = list_images(calibration_dir)
+    random.Random(42).shuffle(samples)
+
+    def generator():
+        for image_path, _ in samples[:num_samples]:
+            yield [to_float(np.expand_dims(load_image(image_path), axis=0))]
+
+    return generator
+
+def build_uint8_model(model):
+    """Wrap the float model so it takes uint8 pixels and rescales them in-graph"""
+    inputs = tf.keras.Input(shape=(224, 224, 3), dtype=tf.uint8, name='pixels')
+    x = layers.Rescaling(1.0 / 255.0)(tf.cast(inputs, tf.float32))
+    outputs = model(x)
+    return tf.keras.Model(inputs, outputs, name='cnn_model_uint8')
+
+def export_uint8_keras(model, output_path):
+    """Save the uint8-input Keras model"""
+    uint8_model = build_uint8_model(model)
+    uint8_model.save(output_path)
+    print(f"✓ uint8-input Keras model saved to {output_path}")
+    return uint8_model
+
+def export_fp16(model, output_path):
+    """Convert to TFLite with float16 weights"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    print(f"✓ float16 model saved to {output_path}")
+
+def export_int8(model, output_path, calibration_dir, num_samples=200):
+    """Convert to TFLite with post-training full-integer quantization"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset(calibration_dir, num_samples)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    print(f"✓ int8 model saved to {output_path}")
+
+def measure_latency(predict_fn, image, repeats=20):
+    """Median single-image latency in milliseconds"""
+    batch = np.expand_dims(image, axis=0)
+    predict_fn(batch)  # Warm-up
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return float(np.median(timings))
+
+def report_drift(model, artifacts, test_dir, max_samples=1000, batch_size=32):
+    """Compare quantized backends against the float model on the test set"""
+    samples = list_images(test_dir)[:max_samples]
+    if not samples:
+        print(f"⚠ No test images found in {test_dir} - skipping drift report")
+        return {}
+
+    images = np.stack([load_image(path) for path, _ in samples])
+    labels = np.array([label for _, label in samples])
+
+    def keras_predict(batch):
+        return model.predict(to_float(batch), verbose=0)[:, 0]
+
+    backends = {'keras': keras_predict}
+    for name, path in artifacts.items():
+        backends[name] = TFLiteBackend(path, name=name).predict
+
+    scores = {}
+    for name, predict_fn in backends.items():
+        scores[name] = np.concatenate([
+            predict_fn(images[i:i + batch_size])
+            for i in range(0, len(images), batch_size)
+        ])
+
+    float_scores = scores['keras']
+    float_accuracy = float(np.mean((float_scores > 0.5) == labels))
+    report = {}
+
+    print("\n" + "=" * 70)
+    print("ACCURACY DRIFT vs FLOAT32")
+    print("=" * 70)
+    print(f"{'backend':<14}{'accuracy':>10}{'drift':>10}{'agreement':>11}{'mean |Δ|':>10}{'latency ms':>12}")
+
+    for name, predict_fn in backends.items():
+        accuracy = float(np.mean((scores[name] > 0.5) == labels))
+        report[name] = {
+            'accuracy': accuracy,
+            'accuracy_drift': accuracy - float_accuracy,
+            'agreement': float(np.mean((scores[name] > 0.5) == (float_scores > 0.5))),
+            'mean_abs_score_diff': float(np.mean(np.abs(scores[name] - float_scores))),
+            'max_abs_score_diff': float(np.max(np.abs(scores[name] - float_scores))),
+            'latency_ms': measure_latency(predict_fn, images[0]),
+            'samples': len(samples)
+        }
+        r = report[name]
+        print(f"{name:<14}{r['accuracy']*100:>9.2f}%{r['accuracy_drift']*100:>+9.2f}%"
+              f"{r['agreement']*100:>10.2f}%{r['mean_abs_score_diff']:>10.4f}{r['latency_ms']:>12.2f}")
+
+    return report
+
+def export_quantized_models(model_path, calibration_dir, test_dir, num_calibration=200):
+    """Export the uint8-input Keras model, float16 and int8 TFLite models and report drift"""
+    print("=" * 70)
+    print("SERVING MODEL EXPORT")
+    print("=" * 70)
+
+    if not os.path.exists(model_path):
+        print(f"Error: Model not found at {model_path}")
+        print("Please train the model first using train_model.py")
+        return
+
+    model = load_model(model_path)
+    print(f"✓ Model loaded from {model_path}")
+
+    artifacts = {
+        'tflite_fp16': str(Config.TFLITE_FP16_MODEL_PATH),
+        'tflite_int8': str(Config.TFLITE_INT8_MODEL_PATH)
+    }
+
+    uint8_model = export_uint8_keras(model, str(Config.KERAS_UINT8_MODEL_PATH))
+    export_fp16(uint8_model, artifacts['tflite_fp16'])
+    export_int8(model, artifacts['tflite_int8'], calibration_dir, num_calibration)
+
+    report = report_drift(model, artifacts, test_dir)
+
+    report_path = os.path.join(os.path.dirname(artifacts['tflite_int8']), 'quantization_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Drift report saved to {report_path}")
+    print("Set INFERENCE_BACKEND=tflite_fp16 or tflite_int8 to serve a quantized model")
+
+    return report
+
+if __name__ == "__main__":
+    # Configuration
+    MODEL_PATH = str(Config.MODEL_PATH)
+    CALIBRATION_DIR = "../processed_dataset/train"
+    TEST_DATA_DIR = "../processed_dataset/test"
+    NUM_CALIBRATION_SAMPLES = 200
+
+    # Check if calibration data exists
+    if not os.path.exists(CALIBRATION_DIR):
+        print(f"Error: Calibration data not found at {CALIBRATION_DIR}")
+        print("Please run data_preprocessing.py first!")
+        exit(1)
+
+    export_quantized_models(
+        model_path=MODEL_PATH,
+        calibration_dir=CALIBRATION_DIR,
+        test_dir=TEST_DATA_DIR,
+        num_calibration=NUM_CALIBRATION_SAMPLES
+    )
+
+    print("\n✓ Export complete!")
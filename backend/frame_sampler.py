@@ -0,0 +1,86 @@
+"""
+Seek-free sequential frame sampler
+Reads a video stream once in order instead of seeking before every sampled frame
+"""
+
+import time
+import cv2
+
+# With no fixed max_gap, the first gap at least this wide is crossed with a
+# seek so its cost can be measured against the cost of grab()
+SEEK_PROBE_GAP = 24
+
+# Weight of the newest measurement in the running cost averages
+COST_SMOOTHING = 0.3
+
+
+def sample_frames(cap, frame_indices, max_gap=None):
+    """
+    Yield (index, frame) for each requested frame index, in ascending order
+
+    Frames between targets are skipped with grab(), which demuxes and decodes
+    without converting to BGR. Only target frames pay for retrieve(). When
+    walking a gap would cost more than seeking over it, we seek instead.
+
+    The break-even gap depends on the file (mostly its keyframe interval), so
+    by default it is measured on the stream itself: a running average of the
+    time per grab() and per seek, seeking once the gap's walking cost exceeds
+    the seek cost. Pass max_gap to use a fixed threshold instead.
+
+    Args:
+        cap: Opened cv2.VideoCapture - reading continues from its current position
+        frame_indices: Frame indices to read (duplicates are yielded again)
+        max_gap: Largest gap walked with grab() before seeking (None = measure)
+    """
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    last_index = None
+    last_frame = None
+    grab_cost = None  # Seconds per grab()
+    seek_cost = None  # Seconds per seek + first grab
+
+    def smooth(average, sample):
+        return sample if average is None else average + COST_SMOOTHING * (sample - average)
+
+    for idx in sorted(int(i) for i in frame_indices):
+        if idx == last_index:
+            yield idx, last_frame
+            continue
+
+        gap = idx - position
+        if gap < 0:
+            seek = True
+        elif max_gap is not None:
+            seek = gap > max_gap
+        elif seek_cost is None or grab_cost is None:
+            seek = gap >= SEEK_PROBE_GAP
+        else:
+            seek = gap * grab_cost > seek_cost
+
+        start = time.perf_counter()
+        if seek:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            if not cap.grab():
+                return
+            seek_cost = smooth(seek_cost, time.perf_counter() - start)
+        else:
+            for _ in range(gap + 1):
+                if not cap.grab():
+                    return
+            grab_cost = smooth(grab_cost, (time.perf_counter() - start) / (gap + 1))
+
+        ret, frame = cap.retrieve()
+        position = idx + 1
+
+        if ret:
+            last_index, last_frame = idx, frame
+            yield idx, frame
+
+
+def sample_frames_seek(cap, frame_indices):
+    """Yield (index, frame) by seeking before every read (reference implementation)"""
+    for idx in frame_indices:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+        ret, frame = cap.read()
+
+        if ret:
+            yield int(idx), frame
@@ -0,0 +1,132 @@
+"""
+Inference backends
+Every backend takes a (N, 224, 224, 3) batch - uint8 RGB pixels, or float32
+already scaled to [0, 1] - and returns N fake-probability scores.
+Models exported with an in-graph Rescaling layer take the uint8 batch as is;
+for older float-input models the batch is scaled once here.
+
+- keras:        the Keras model (cnn_model_uint8.h5 when exported, else cnn_model.h5)
+- tflite_fp16:  TFLite conversion with float16 weights
+- tflite_int8:  TFLite post-training full-integer quantization
+"""
+
+import os
+import threading
+import numpy as np
+from config import Config
+from preprocessing import to_float
+
+
+class KerasBackend:
+    """Full float32 Keras model"""
+
+    name = 'keras'
+
+    def __init__(self, model_path, num_threads=None):
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+
+        # Must run before the TF runtime initializes (e.g. in a fresh model worker)
+        if num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+
+        self.model_path = str(model_path)
+        self.model = load_model(self.model_path)
+        self.uint8_input = self.model.inputs[0].dtype == tf.uint8
+
+    def predict(self, images):
+        if not (self.uint8_input and images.dtype == np.uint8):
+            images = to_float(images)
+        return self.model.predict(images, verbose=0)[:, 0]
+
+
+class TFLiteBackend:
+    """TFLite interpreter - handles both float and int8-quantized input/output tensors"""
+
+    def __init__(self, model_path, name='tflite', num_threads=None):
+        self.name = name
+        self.model_path = str(model_path)
+
+        # Prefer the small tflite-runtime package when installed
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=self.model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._lock = threading.Lock()  # Interpreters are not thread-safe
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+
+    def _resize(self, batch_size):
+        """Resize the interpreter's input tensor when the batch size changes"""
+        if batch_size != self._batch_size:
+            shape = [batch_size] + list(self._input['shape'][1:])
+            self.interpreter.resize_tensor_input(self._input['index'], shape)
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch_size = batch_size
+
+    def _prepare_input(self, images):
+        """Convert the batch to whatever the model's input tensor expects"""
+        dtype = self._input['dtype']
+        scale, zero_point = self._input['quantization']
+
+        # Raw uint8 pixels (in-graph Rescaling)
+        if dtype == np.uint8 and scale == 0 and images.dtype == np.uint8:
+            return images
+
+        if dtype == np.float32:
+            return to_float(images)
+
+        # Quantized integer input
+        info = np.iinfo(dtype)
+        quantized = np.round(to_float(images) / scale + zero_point)
+        return np.clip(quantized, info.min, info.max).astype(dtype)
+
+    def predict(self, images):
+        with self._lock:
+            self._resize(len(images))
+            self.interpreter.set_tensor(self._input['index'], self._prepare_input(images))
+            self.interpreter.invoke()
+            scores = self.interpreter.get_tensor(self._output['index'])[:, 0]
+
+        # Dequantize output
+        if self._output['dtype'] != np.float32:
+            scale, zero_point = self._output['quantization']
+            scores = (scores.astype(np.float32) - zero_point) * scale
+
+        return scores
+
+
+BACKENDS = ('keras', 'tflite_fp16', 'tflite_int8')
+
+def backend_model_path(name):
+    """Return the model artifact path for a backend name"""
+    keras_path = Config.MODEL_PATH
+    if os.path.exists(str(Config.KERAS_UINT8_MODEL_PATH)):
+        keras_path = Config.KERAS_UINT8_MODEL_PATH
+
+    paths = {
+        'keras': keras_path,
+        'tflite_fp16': Config.TFLITE_FP16_MODEL_PATH,
+        'tflite_int8': Config.TFLITE_INT8_MODEL_PATH
+    }
+    if name not in paths:
+        raise ValueError(f"Unknown inference backend '{name}' - choose from {', '.join(BACKENDS)}")
+    return paths[name]
+
+def create_backend(name, model_path=None, num_threads=None):
+    """Instantiate an inference backend by name"""
+    if model_path is None:
+        model_path = backend_model_path(name)
+    elif name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}' - choose from {', '.join(BACKENDS)}")
+
+    if name == 'keras':
+        return KerasBackend(model_path, num_threads=num_threads)
+    return TFLiteBackend(model_path, name=name, num_threads=num_threads or Config.TFLITE_NUM_THREADS)
@@ -0,0 +1,127 @@
+"""
+Dynamic micro-batching inference engine
+Collects concurrent single-image requests into one batched forward pass
+"""
+
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class InferenceEngine:
+    """Batch concurrent predictions within a max-wait window and max batch size"""
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=10, timeout=60):
+        """
+        Args:
+            predict_fn: Callable taking a (N, H, W, C) array and returning N scores
+            max_batch_size: Largest batch sent to the model in one call
+            max_wait_ms: How long the first request in a batch waits for company
+            timeout: Default seconds predict() waits for its score (None = forever)
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._buffer = None  # Reused batch buffer, allocated on the first batch
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Batch fill statistics
+        self._batches = 0
+        self._requests = 0
+        self._size_histogram = [0] * (self.max_batch_size + 1)
+
+    def start(self):
+        """Start the batching thread if it is not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='inference-engine', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, image):
+        """Queue one preprocessed image and return a Future for its score"""
+        self.start()
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def predict(self, image, timeout=None):
+        """
+        Predict a single preprocessed image, blocking until its batch runs
+        Raises TimeoutError after timeout seconds (default: the engine's timeout)
+        """
+        return self.submit(image).result(timeout=timeout if timeout is not None else self.timeout)
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until full or timed out"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _stack(self, images):
+        """Copy the batch's images into the reusable buffer - returns the filled view"""
+        first = images[0]
+        if self._buffer is None or self._buffer.shape[1:] != first.shape or self._buffer.dtype != first.dtype:
+            self._buffer = np.empty((self.max_batch_size,) + first.shape, dtype=first.dtype)
+        return np.stack(images, out=self._buffer[:len(images)])
+
+    def _run(self):
+        """Batching loop"""
+        while True:
+            batch = self._collect_batch()
+            futures = [future for _, future in batch]
+
+            try:
+                images = self._stack([image for image, _ in batch])
+                scores = self.predict_fn(images)
+                if len(scores) != len(futures):
+                    raise RuntimeError(f'Model returned {len(scores)} scores for a batch of {len(futures)}')
+
+                for future, score in zip(futures, scores):
+                    future.set_result(float(score))
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+            with self._lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._size_histogram[len(batch)] += 1
+
+    def stats(self):
+        """Report how full batches have been, for tuning the batch size and wait window"""
+        with self._lock:
+            avg_batch_size = self._requests / self._batches if self._batches else 0
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': round(self.max_wait * 1000, 2),
+                'batches': self._batches,
+                'requests': self._requests,
+                'avg_batch_size': round(avg_batch_size, 2),
+                'avg_fill_ratio': round(avg_batch_size / self.max_batch_size, 3),
+                'batch_size_histogram': {
+                    str(size): count
+                    for size, count in enumerate(self._size_histogram)
+                    if count
+                },
+                'queue_depth': self._queue.qsize()
+            }
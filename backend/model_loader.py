@@ -0,0 +1,146 @@
+"""
+Model lifecycle - lazy background loading, warm-up and readiness reporting
+Importing the detection routes no longer imports TensorFlow; the model is
+loaded in a background thread at startup and warmed up at the shapes we serve.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from config import Config
+from inference_backends import create_backend, backend_model_path
+
+
+class ModelLoader:
+    """Owns the inference backend and tracks its state: unloaded → loading → warming → ready"""
+
+    def __init__(self, backend_name):
+        self.backend_name = backend_name
+        self.model_path = None
+        self.model = None  # Inference backend - predict(batch) returns one score per image
+        self.version = None  # Keys the result cache - None disables caching
+        self.state = 'unloaded'  # 'unloaded', 'loading', 'warming', 'ready', 'missing' or 'failed'
+        self.error = None
+        self.load_time = None
+        self.warmup_latency = {}
+        self._lock = threading.Lock()
+        self._settled = threading.Event()
+
+    def start(self):
+        """Begin loading in a background thread (no-op if already started)"""
+        with self._lock:
+            if self.state != 'unloaded':
+                return
+            self.state = 'loading'
+
+        thread = threading.Thread(target=self._load_and_warm_up, name='model-loader', daemon=True)
+        thread.start()
+
+    def wait(self, timeout=None):
+        """Block until loading has finished one way or another - True if settled"""
+        return self._settled.wait(timeout)
+
+    def get_model(self, timeout=None):
+        """Return the loaded model, starting/waiting for the load if needed - None if unavailable"""
+        self.start()
+        self.wait(timeout)
+        return self.model if self.state == 'ready' else None
+
+    def is_ready(self):
+        return self.state == 'ready'
+
+    def _load_and_warm_up(self):
+        try:
+            self.model_path = str(backend_model_path(self.backend_name))
+            if not os.path.exists(self.model_path):
+                print(f"⚠ Warning: Model not found at {self.model_path}")
+                self.state = 'missing'
+                return
+
+            start_time = time.time()
+            if Config.MODEL_SERVER_ENABLED:
+                from model_server import ModelWorkerPool
+                model = ModelWorkerPool(
+                    self.backend_name,
+                    self.model_path,
+                    num_workers=Config.MODEL_SERVER_WORKERS,
+                    queue_depth=Config.MODEL_SERVER_QUEUE_DEPTH,
+                    slot_capacity=max(Config.INFERENCE_MAX_BATCH_SIZE, Config.VIDEO_MAX_CHUNK_SIZE),
+                    threads_per_worker=Config.MODEL_SERVER_THREADS_PER_WORKER,
+                    pin_cpus=Config.MODEL_SERVER_PIN_CPUS,
+                    warmup_sizes=self.warmup_batch_sizes(),
+                    request_timeout=Config.MODEL_SERVER_REQUEST_TIMEOUT
+                )
+            else:
+                model = create_backend(self.backend_name, self.model_path)
+            self.version = compute_model_version(self.model_path)
+            self.load_time = time.time() - start_time
+            print(f"✓ ML Model loaded from {self.model_path} "
+                  f"[{self.backend_name}] ({self.load_time:.2f}s)")
+
+            self.state = 'warming'
+            self.warm_up(model)
+            self.model = model
+            self.state = 'ready'
+            print(f"✓ ML Model warmed up: {self.warmup_latency}")
+
+        except Exception as e:
+            print(f"⚠ Warning: Could not load ML model: {e}")
+            self.error = str(e)
+            self.state = 'failed'
+        finally:
+            self._settled.set()
+
+    def warmup_batch_sizes(self):
+        """Batch sizes served by the micro-batching engine and the video path"""
+        return sorted({
+            1,
+            Config.INFERENCE_MAX_BATCH_SIZE,
+            min(10, Config.VIDEO_MAX_CHUNK_SIZE),
+            Config.VIDEO_MAX_CHUNK_SIZE
+        })
+
+    def warm_up(self, model):
+        """Run dummy batches at every batch size we serve so graph tracing happens now"""
+        import numpy as np
+
+        for batch_size in self.warmup_batch_sizes():
+            dummy = np.zeros((batch_size, 224, 224, 3), dtype=np.uint8)
+            start_time = time.time()
+            model.predict(dummy)
+            self.warmup_latency[batch_size] = round(time.time() - start_time, 4)
+
+    def status(self):
+        """Readiness report for /health and /ready"""
+        return {
+            'state': self.state,
+            'ready': self.is_ready(),
+            'backend': self.backend_name,
+            'model_server': Config.MODEL_SERVER_ENABLED,
+            'model_path': self.model_path,
+            'model_version': self.version,
+            'load_time': round(self.load_time, 3) if self.load_time is not None else None,
+            'warmup_latency': {str(size): latency for size, latency in self.warmup_latency.items()},
+            'error': self.error
+        }
+
+
+def compute_model_version(model_path):
+    """Return Config.MODEL_VERSION (per backend) or a short content hash of the model file"""
+    if Config.MODEL_VERSION:
+        return f"{Config.MODEL_VERSION}-{Config.INFERENCE_BACKEND}"
+
+    sha256 = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()[:16]
+
+
+# Shared loader - nothing is loaded until start() or get_model() is called
+MODEL_LOADER = ModelLoader(Config.INFERENCE_BACKEND)
+
+def get_model():
+    """Return the ready model, waiting up to MODEL_LOAD_TIMEOUT for it - None if unavailable"""
+    return MODEL_LOADER.get_model(timeout=Config.MODEL_LOAD_TIMEOUT)
@@ -0,0 +1,300 @@
+"""
+Multi-process model server
+N worker processes each hold their own copy of the inference backend, so
+inference is not bound by the web process's GIL or a single TF runtime.
+Batches of uint8 pixels travel through multiprocessing.shared_memory slots
+instead of being pickled; only slot ids and scores go over the queues.
+
+The pool exposes the same predict(batch) interface as the inference backends,
+so the model loader can hand it to predict_image/predict_video transparently.
+"""
+
+import os
+import queue
+import atexit
+import itertools
+import threading
+import multiprocessing as mp
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+import numpy as np
+from inference_backends import create_backend
+from preprocessing import INPUT_SHAPE
+
+
+# How often the result collector checks that every worker is still alive (seconds)
+WATCH_INTERVAL = 0.5
+
+
+def _worker_main(worker_id, backend_name, model_path, slot_names, slot_capacity,
+                 task_queue, result_queue, current_requests, num_threads, cpus, warmup_sizes,
+                 backend_factory):
+    """
+    Worker process: load the backend, then serve (request_id, slot, count) tasks
+    current_requests[worker_id] holds the last request taken - written to shared
+    memory before scoring, so the pool knows which batch died with the worker
+    """
+    try:
+        # Pin this worker to its CPU share and limit runtime threads
+        if cpus and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cpus)
+
+        backend = backend_factory(backend_name, model_path, num_threads=num_threads)
+
+        slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+        buffers = [
+            np.ndarray((slot_capacity,) + INPUT_SHAPE, dtype=np.uint8, buffer=slot.buf)
+            for slot in slots
+        ]
+
+        for batch_size in warmup_sizes:
+            backend.predict(np.zeros((batch_size,) + INPUT_SHAPE, dtype=np.uint8))
+
+        result_queue.put(('ready', worker_id, os.getpid()))
+    except Exception as e:
+        result_queue.put(('failed', worker_id, str(e)))
+        return
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        request_id, slot_id, count = task
+        current_requests[worker_id] = request_id
+        try:
+            scores = backend.predict(buffers[slot_id][:count])
+            result_queue.put(('result', request_id, [float(s) for s in scores]))
+        except Exception as e:
+            result_queue.put(('error', request_id, str(e)))
+
+    del buffers
+    for slot in slots:
+        slot.close()
+
+
+class ModelWorkerPool:
+    """Pool of model worker processes fed through shared-memory slots"""
+
+    def __init__(self, backend_name, model_path, num_workers=2, queue_depth=8,
+                 slot_capacity=32, threads_per_worker=1, pin_cpus=True,
+                 warmup_sizes=(1,), start_timeout=300, request_timeout=60,
+                 backend_factory=create_backend):
+        self.name = f'{backend_name} x{num_workers} workers'
+        self.num_workers = max(1, int(num_workers))
+        self.slot_capacity = max(1, int(slot_capacity))
+        self.request_timeout = request_timeout
+        queue_depth = max(1, int(queue_depth))
+
+        # One shared-memory slot per in-flight batch - queue depth bounds memory and backlog
+        slot_bytes = int(np.prod((self.slot_capacity,) + INPUT_SHAPE))
+        self._slots = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(queue_depth)]
+        self._buffers = [
+            np.ndarray((self.slot_capacity,) + INPUT_SHAPE, dtype=np.uint8, buffer=slot.buf)
+            for slot in self._slots
+        ]
+        self._free_slots = _SlotPool(range(queue_depth))
+
+        self._ctx = mp.get_context('spawn')  # Fresh interpreters - never fork a live TF runtime
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._current_requests = self._ctx.RawArray('q', [-1] * self.num_workers)
+        self._futures = {}
+        self._futures_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._closing = False
+        self._dead_workers = set()  # Crashed and failed to restart
+
+        cpu_sets = self._cpu_sets() if pin_cpus else [None] * self.num_workers
+        self._worker_args = [
+            (worker_id, backend_name, str(model_path),
+             [slot.name for slot in self._slots], self.slot_capacity,
+             self._task_queue, self._result_queue, self._current_requests,
+             threads_per_worker, cpu_sets[worker_id], tuple(warmup_sizes),
+             backend_factory)
+            for worker_id in range(self.num_workers)
+        ]
+        self._processes = [None] * self.num_workers
+        for worker_id in range(self.num_workers):
+            self._start_worker(worker_id)
+
+        atexit.register(self.shutdown)
+        self._wait_for_workers(start_timeout)
+
+        self._collector = threading.Thread(target=self._collect_results, name='model-pool-results', daemon=True)
+        self._collector.start()
+
+    def _cpu_sets(self):
+        """Split the available CPUs evenly between workers"""
+        if not hasattr(os, 'sched_getaffinity'):
+            return [None] * self.num_workers
+
+        cpus = sorted(os.sched_getaffinity(0))
+        if len(cpus) < self.num_workers:
+            return [None] * self.num_workers
+
+        share = len(cpus) // self.num_workers
+        return [set(cpus[i * share:(i + 1) * share]) for i in range(self.num_workers)]
+
+    def _start_worker(self, worker_id):
+        """Start (or restart) one worker process"""
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=self._worker_args[worker_id],
+            name=f'model-worker-{worker_id}',
+            daemon=True
+        )
+        process.start()
+        self._processes[worker_id] = process
+
+    def _wait_for_workers(self, timeout):
+        """Block until every worker has loaded its model - shuts the pool down if one does not"""
+        try:
+            for _ in range(self.num_workers):
+                status, worker_id, info = self._result_queue.get(timeout=timeout)
+                if status != 'ready':
+                    raise RuntimeError(f"Model worker {worker_id} failed to start: {info}")
+        except queue.Empty:
+            self.shutdown()
+            raise RuntimeError(f"Model workers did not start within {timeout}s")
+        except Exception:
+            self.shutdown()
+            raise
+        print(f"✓ Model worker pool ready ({self.num_workers} workers)")
+
+    def _collect_results(self):
+        """Resolve pending futures as workers report back, and replace workers that die"""
+        while True:
+            try:
+                message = self._result_queue.get(timeout=WATCH_INTERVAL)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                break
+
+            self._check_workers()
+            if not message:
+                continue
+
+            status, request_id, payload = message
+            if status == 'ready':
+                print(f"✓ Model worker {request_id} restarted")
+                continue
+            if status == 'failed':
+                print(f"✗ Model worker {request_id} failed to restart: {payload}")
+                self._dead_workers.add(request_id)
+                if len(self._dead_workers) == self.num_workers:
+                    self._fail_pending(RuntimeError('Model worker pool has no live workers'))
+                continue
+
+            if status == 'result':
+                self._resolve(request_id, result=np.asarray(payload, dtype=np.float32))
+            else:
+                self._resolve(request_id, error=RuntimeError(payload))
+
+    def _resolve(self, request_id, result=None, error=None):
+        """Complete one pending request and free its slot (ignored if already completed)"""
+        with self._futures_lock:
+            future, slot_id = self._futures.pop(request_id, (None, None))
+        if future is None:
+            return
+
+        self._free_slots.release(slot_id)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _fail_pending(self, error):
+        """Fail every request still waiting for a worker"""
+        with self._futures_lock:
+            request_ids = list(self._futures)
+        for request_id in request_ids:
+            self._resolve(request_id, error=error)
+
+    def _check_workers(self):
+        """Fail the batch a dead worker was scoring and start a replacement"""
+        if self._closing:
+            return
+        for worker_id, process in enumerate(self._processes):
+            if process is None or process.is_alive() or worker_id in self._dead_workers:
+                continue
+
+            # The worker's last taken request - already resolved unless it died scoring it
+            self._resolve(self._current_requests[worker_id], error=RuntimeError(
+                f"Model worker {worker_id} died (exit code {process.exitcode}) while scoring this batch"
+            ))
+            print(f"⚠ Model worker {worker_id} died (exit code {process.exitcode}), restarting")
+            self._start_worker(worker_id)
+
+    def _submit(self, images):
+        """Copy one chunk into a free slot and queue it - blocks when the queue is full"""
+        if len(self._dead_workers) == self.num_workers:
+            raise RuntimeError('Model worker pool has no live workers')
+        if images.dtype != np.uint8:
+            images = np.clip(np.round(images * 255.0), 0, 255)  # Float [0, 1] input
+        slot_id = self._free_slots.acquire()
+        count = len(images)
+        self._buffers[slot_id][:count] = images
+
+        request_id = next(self._request_ids)
+        future = Future()
+        with self._futures_lock:
+            self._futures[request_id] = (future, slot_id)
+
+        self._task_queue.put((request_id, slot_id, count))
+        return future
+
+    def predict(self, images):
+        """
+        Score a batch of any size - same interface as the inference backends
+        Raises TimeoutError if a chunk is not scored within request_timeout seconds
+        """
+        futures = [
+            self._submit(images[start:start + self.slot_capacity])
+            for start in range(0, len(images), self.slot_capacity)
+        ]
+        return np.concatenate([future.result(timeout=self.request_timeout) for future in futures])
+
+    def shutdown(self):
+        """Stop workers and release shared memory"""
+        self._closing = True
+        processes = [process for process in self._processes if process is not None]
+        for process in processes:
+            if process.is_alive():
+                self._task_queue.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._result_queue.put(None)  # Stop the collector
+        self._fail_pending(RuntimeError('Model worker pool shut down'))
+
+        self._buffers = []
+        for slot in self._slots:
+            try:
+                slot.close()
+                slot.unlink()
+            except FileNotFoundError:
+                pass
+        self._slots = []
+
+
+class _SlotPool:
+    """Blocking free-list of shared-memory slot ids"""
+
+    def __init__(self, slot_ids):
+        self._free = list(slot_ids)
+        self._available = threading.Condition()
+
+    def acquire(self):
+        with self._available:
+            while not self._free:
+                self._available.wait()
+            return self._free.pop()
+
+    def release(self, slot_id):
+        with self._available:
+            self._free.append(slot_id)
+            self._available.notify()
@@ -4,7 +4,10 @@ from datetime import datetime
 class User(db.Model):
     """User model - matches schema.sql structure"""
     __tablename__ = 'users'
-    __table_args__ = {'extend_existing': True}  # Allow table redefinition
+    __table_args__ = (
+        db.Index('idx_users_email', 'email'),
+        {'extend_existing': True}  # Allow table redefinition
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
@@ -32,7 +35,13 @@ class User(db.Model):
 class Detection(db.Model):
     """Detection history model - matches schema.sql structure"""
     __tablename__ = 'detection_history'
-    __table_args__ = {'extend_existing': True}  # Allow table redefinition
+    __table_args__ = (
+        # Keyset pagination of a user's history: WHERE user_id = ? ORDER BY created_at, id
+        db.Index('idx_detection_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('idx_detection_created_at', 'created_at'),
+        # AUTOINCREMENT as in schema.sql - ids of archived rows are never reused
+        {'extend_existing': True, 'sqlite_autoincrement': True}  # Allow table redefinition
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -59,4 +68,119 @@ class Detection(db.Model):
             'processing_time': round(self.processing_time, 2),
             'metadata': self.extra_data,  # Return as 'metadata' in JSON
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class UserStats(db.Model):
+    """Per-user detection counters - kept in step with detection_history by user_stats.py"""
+    __tablename__ = 'user_stats'
+    __table_args__ = {'extend_existing': True}  # Allow table redefinition
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    fake_count = db.Column(db.Integer, nullable=False, default=0)
+    real_count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def to_dict(self):
+        """Convert to dictionary (same shape as /api/detection/stats)"""
+        return {
+            'total_detections': self.total,
+            'fake_count': self.fake_count,
+            'real_count': self.real_count,
+            'avg_confidence': round(self.confidence_sum / self.total, 2) if self.total else 0
+        }
+
+
+class DailyRollup(db.Model):
+    """Detection counts per day, result and file type - maintained by rollups.py"""
+    __tablename__ = 'daily_rollups'
+    __table_args__ = {'extend_existing': True}  # Allow table redefinition
+    
+    day = db.Column(db.Date, primary_key=True)  # UTC day of created_at
+    result = db.Column(db.String(10), primary_key=True)  # 'real' or 'fake'
+    file_type = db.Column(db.String(10), primary_key=True)  # 'image' or 'video'
+    count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    processing_time_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class DailyLatencyBucket(db.Model):
+    """Processing-time histogram per day and file type, for percentiles (see rollups.LATENCY_BUCKETS_MS)"""
+    __tablename__ = 'daily_latency_buckets'
+    __table_args__ = {'extend_existing': True}  # Allow table redefinition
+    
+    day = db.Column(db.Date, primary_key=True)
+    file_type = db.Column(db.String(10), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)  # Index into LATENCY_BUCKETS_MS
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DataVersion(db.Model):
+    """Change counters behind the API's ETags - scope 'user:<id>', 'detections' or 'users'"""
+    __tablename__ = 'data_versions'
+    __table_args__ = {'extend_existing': True}  # Allow table redefinition
+    
+    scope = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AnalysisJob(db.Model):
+    """Background video analysis job - survives restarts through the database"""
+    __tablename__ = 'analysis_jobs'
+    __table_args__ = (
+        db.Index('idx_jobs_status', 'status'),
+        {'extend_existing': True}  # Allow table redefinition
+    )
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    file_name = db.Column(db.String(255), nullable=False)
+    file_type = db.Column(db.String(10), nullable=False, default='video')
+    file_path = db.Column(db.String(500), nullable=False)
+    content_hash = db.Column(db.String(64))  # SHA-256 of the upload, for the result cache
+    tier = db.Column(db.String(20))  # Analysis tier, None = default tier
+    status = db.Column(db.String(10), nullable=False, default='queued')  # 'queued', 'running', 'done' or 'failed'
+    detection_id = db.Column(db.Integer, db.ForeignKey('detection_history.id'))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'job_id': self.id,
+            'file_name': self.file_name,
+            'file_type': self.file_type,
+            'tier': self.tier,
+            'status': self.status,
+            'detection_id': self.detection_id,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class CachedResult(db.Model):
+    """Content-hash result cache - one verdict per (file hash, model version)"""
+    __tablename__ = 'result_cache'
+    __table_args__ = {'extend_existing': True}  # Allow table redefinition
+    
+    content_hash = db.Column(db.String(64), primary_key=True)  # SHA-256 hex
+    model_version = db.Column(db.String(64), primary_key=True)
+    file_type = db.Column(db.String(10), nullable=False)  # 'image' or 'video'
+    file_path = db.Column(db.String(500))  # First stored copy of the file
+    result = db.Column(db.String(10), nullable=False)  # 'real' or 'fake'
+    confidence = db.Column(db.Float, nullable=False)
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'content_hash': self.content_hash,
+            'model_version': self.model_version,
+            'file_type': self.file_type,
+            'file_path': self.file_path,
+            'result': self.result,
+            'confidence': self.confidence
+        }
@@ -0,0 +1,81 @@
+"""
+Image decoding and preprocessing shared by the serving paths
+
+Frames are resized and converted straight into a reusable uint8 RGB batch
+buffer - no float temporaries per frame. Scaling to [0, 1] happens once per
+batch inside the inference runtime: either a Rescaling layer in the served
+model (see export_quantized_model.py) or a single conversion in the backend.
+"""
+
+import numpy as np
+import cv2
+
+INPUT_SIZE = (224, 224)
+INPUT_SHAPE = (224, 224, 3)
+
+
+# imread/imdecode flags that decode at 1/n resolution (JPEG skips the discarded DCT detail)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+
+def decode_image(data, reduce=1):
+    """Decode encoded image bytes (PNG/JPEG/...) into a BGR array without touching disk"""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    image = cv2.imdecode(buffer, REDUCED_DECODE_FLAGS.get(reduce, cv2.IMREAD_COLOR))
+    if image is None:
+        raise ValueError('Could not decode image data')
+    return image
+
+
+def preprocess_into(image, out):
+    """Resize a BGR image into out (224, 224, 3) uint8 and convert it to RGB in place"""
+    cv2.resize(image, INPUT_SIZE, dst=out)
+    cv2.cvtColor(out, cv2.COLOR_BGR2RGB, dst=out)
+    return out
+
+
+def preprocess_image(image):
+    """BGR image → (224, 224, 3) uint8 RGB"""
+    return preprocess_into(image, np.empty(INPUT_SHAPE, dtype=np.uint8))
+
+
+def to_float(images):
+    """Scale a uint8 batch to float32 in [0, 1] with one allocation (float input passes through)"""
+    if images.dtype == np.float32:
+        return images
+    scaled = images.astype(np.float32)
+    scaled *= 1.0 / 255.0
+    return scaled
+
+
+class FrameBatch:
+    """Preallocated uint8 batch that frames are written into one slot at a time"""
+
+    def __init__(self, capacity):
+        self.buffer = np.empty((max(1, int(capacity)),) + INPUT_SHAPE, dtype=np.uint8)
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return len(self.buffer)
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def add(self, image):
+        """Preprocess a BGR frame into the next free slot - returns the slot index"""
+        preprocess_into(image, self.buffer[self.count])
+        self.count += 1
+        return self.count - 1
+
+    def view(self):
+        """Filled part of the buffer (no copy)"""
+        return self.buffer[:self.count]
+
+    def clear(self):
+        self.count = 0
@@ -0,0 +1,156 @@
+"""
+Content-hash result cache
+Identical uploads skip re-analysis: verdicts are stored per (SHA-256, model version)
+in the result_cache table, with an in-process LRU in front of it.
+Lookups never write - hit counts accumulate in memory and a background
+thread adds them to result_cache.hit_count in one short transaction.
+"""
+
+import atexit
+import threading
+from collections import OrderedDict
+from database import db, UPSERT_INSERTS
+from models import CachedResult
+
+
+class ResultCache:
+    """In-process LRU backed by the persistent result_cache table"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max(1, int(max_entries))
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending_hits = {}  # (content_hash, model_version) → hits not yet in the table
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def get(self, content_hash, model_version):
+        """Return the cached verdict dict or None"""
+        key = (content_hash, model_version)
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+
+        if entry is None:
+            row = CachedResult.query.get(key)
+            if row is not None:
+                entry = row.to_dict()
+                self._remember(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+
+        return entry
+
+    def flush_hits(self):
+        """Add the hit counts gathered since the last flush to the table - returns rows updated"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if not pending:
+            return 0
+
+        table = CachedResult.__table__
+        try:
+            # Own connection and transaction - never the caller's session
+            with db.engine.begin() as connection:
+                for (content_hash, model_version), count in pending.items():
+                    connection.execute(
+                        table.update()
+                        .where(table.c.content_hash == content_hash, table.c.model_version == model_version)
+                        .values(hit_count=table.c.hit_count + count)
+                    )
+        except Exception:
+            # Keep the counts for the next flush
+            with self._lock:
+                for key, count in pending.items():
+                    self._pending_hits[key] = self._pending_hits.get(key, 0) + count
+            raise
+        return len(pending)
+
+    def put(self, content_hash, model_version, file_type, file_path, result, confidence):
+        """
+        Store a verdict - written on the caller's session connection, committed with it
+        Concurrent identical uploads race to insert the same key: the first row
+        wins (INSERT ... ON CONFLICT DO NOTHING), the others keep their verdict
+        without failing the request
+        """
+        values = {
+            'content_hash': content_hash,
+            'model_version': model_version,
+            'file_type': file_type,
+            'file_path': file_path,
+            'result': result,
+            'confidence': float(confidence),
+            'hit_count': 0
+        }
+        connection = db.session.connection()
+        insert = UPSERT_INSERTS.get(connection.dialect.name)
+        if insert is not None:
+            connection.execute(insert(CachedResult.__table__).values(**values).on_conflict_do_nothing())
+        else:
+            db.session.merge(CachedResult(**values))
+        self._remember((content_hash, model_version), CachedResult(**values).to_dict())
+
+    def stats(self):
+        """Report hit rate and LRU occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'lru_entries': len(self._lru),
+                'lru_max_entries': self.max_entries,
+                'pending_hit_counts': sum(self._pending_hits.values())
+            }
+
+
+# Shared cache (created on first use)
+RESULT_CACHE = None
+
+def get_result_cache():
+    """Return the shared result cache, creating it on first use"""
+    global RESULT_CACHE
+    if RESULT_CACHE is None:
+        from config import Config
+        RESULT_CACHE = ResultCache(Config.RESULT_CACHE_LRU_SIZE)
+    return RESULT_CACHE
+
+def init_result_cache(app):
+    """Flush hit counts every RESULT_CACHE_FLUSH_INTERVAL seconds and at interpreter exit"""
+    from config import Config
+    cache = get_result_cache()
+    stop = threading.Event()
+
+    def flush():
+        with app.app_context():
+            try:
+                cache.flush_hits()
+            except Exception as e:
+                print(f"Result cache hit count flush failed: {e}")
+
+    def run():
+        while not stop.wait(Config.RESULT_CACHE_FLUSH_INTERVAL):
+            flush()
+
+    threading.Thread(target=run, name='result-cache-flush', daemon=True).start()
+
+    def shutdown():
+        stop.set()
+        flush()
+
+    atexit.register(shutdown)
+    return cache
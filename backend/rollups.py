@@ -0,0 +1,227 @@
+"""
+Daily detection rollups for the admin dashboard
+daily_rollups holds counts and sums per (day, result, file type) and
+daily_latency_buckets a processing-time histogram per (day, file type).
+Both are adjusted in the same flush that inserts or deletes detections, so
+dashboard totals and trends read a few rows per day instead of the history.
+
+Backfill / rebuild from detection_history and the archive:
+    python rollups.py
+"""
+
+from datetime import datetime, timedelta, date
+from sqlalchemy import event, func, case, select, insert
+from sqlalchemy.orm import Session
+from database import db, increment_counters
+from models import Detection, User, DailyRollup, DailyLatencyBucket
+
+# Processing-time bucket upper bounds (ms) - the last bucket is open-ended
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+
+def latency_bucket(processing_time):
+    """Histogram bucket index for a processing time in seconds"""
+    ms = (processing_time or 0.0) * 1000
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+def histogram_percentile(counts, q):
+    """Approximate q-quantile (ms) of a bucket histogram, interpolating inside the bucket"""
+    total = sum(counts)
+    if not total:
+        return None
+
+    target = q * total
+    cumulative = 0
+    for index, count in enumerate(counts):
+        if count and cumulative + count >= target:
+            lower = LATENCY_BUCKETS_MS[index - 1] if index > 0 else 0
+            if index >= len(LATENCY_BUCKETS_MS):
+                return float(lower)
+            upper = LATENCY_BUCKETS_MS[index]
+            return round(lower + (upper - lower) * (target - cumulative) / count, 1)
+        cumulative += count
+    return float(LATENCY_BUCKETS_MS[-1])
+
+def _apply_deltas(session, flush_context, instances):
+    """before_flush hook - fold pending detection inserts/deletes into the rollups"""
+    rollups, buckets = {}, {}
+
+    for obj, sign in [(o, 1) for o in session.new] + [(o, -1) for o in session.deleted]:
+        if not isinstance(obj, Detection):
+            continue
+        day = (obj.created_at or datetime.utcnow()).date()
+
+        delta = rollups.setdefault((day, obj.result, obj.file_type),
+                                   {'count': 0, 'confidence_sum': 0.0, 'processing_time_sum': 0.0})
+        delta['count'] += sign
+        delta['confidence_sum'] += sign * (obj.confidence or 0.0)
+        delta['processing_time_sum'] += sign * (obj.processing_time or 0.0)
+
+        key = (day, obj.file_type, latency_bucket(obj.processing_time))
+        buckets[key] = buckets.get(key, 0) + sign
+
+    if not rollups:
+        return
+
+    # Connection-level statements: same transaction, no re-entrant autoflush
+    connection = session.connection()
+    for (day, result, file_type), delta in rollups.items():
+        increment_counters(connection, DailyRollup.__table__,
+                           {'day': day, 'result': result, 'file_type': file_type}, delta)
+    for (day, file_type, bucket), count in buckets.items():
+        increment_counters(connection, DailyLatencyBucket.__table__,
+                           {'day': day, 'file_type': file_type, 'bucket': bucket}, {'count': count})
+
+def rebuild_rollups():
+    """Recompute both rollup tables from detection_history (grouped queries, no row loading) and the archive"""
+    day = func.date(Detection.created_at)
+    milliseconds = Detection.processing_time * 1000
+    bucket = case(
+        *[(milliseconds <= bound, index) for index, bound in enumerate(LATENCY_BUCKETS_MS)],
+        else_=len(LATENCY_BUCKETS_MS)
+    )
+
+    db.session.execute(DailyRollup.__table__.delete())
+    db.session.execute(DailyLatencyBucket.__table__.delete())
+
+    db.session.execute(insert(DailyRollup.__table__).from_select(
+        ['day', 'result', 'file_type', 'count', 'confidence_sum', 'processing_time_sum'],
+        select(
+            day, Detection.result, Detection.file_type,
+            func.count(Detection.id),
+            func.sum(Detection.confidence),
+            func.sum(Detection.processing_time)
+        ).group_by(day, Detection.result, Detection.file_type)
+    ))
+    db.session.execute(insert(DailyLatencyBucket.__table__).from_select(
+        ['day', 'file_type', 'bucket', 'count'],
+        select(day, Detection.file_type, bucket, func.count(Detection.id))
+        .group_by(day, Detection.file_type, bucket)
+    ))
+    _add_archived_rollups()
+    db.session.commit()
+
+def _add_archived_rollups():
+    """Fold archived detections (see detection_archive.py) into the rebuilt rollups"""
+    from detection_archive import get_archive, from_micros
+
+    users = {user_id for (user_id,) in db.session.query(User.id)}
+    rollups, buckets = {}, {}
+    columns = ('user_id', 'created_at', 'result', 'file_type', 'confidence', 'processing_time')
+    for segment in get_archive().iter_columns(*columns):
+        for user_id, created_at, result, file_type, confidence, processing_time in zip(*[c.tolist() for c in segment]):
+            if user_id not in users:
+                continue
+            day = from_micros(created_at).date()
+            delta = rollups.setdefault((day, result, file_type),
+                                       {'count': 0, 'confidence_sum': 0.0, 'processing_time_sum': 0.0})
+            delta['count'] += 1
+            delta['confidence_sum'] += confidence
+            delta['processing_time_sum'] += processing_time
+
+            key = (day, file_type, latency_bucket(processing_time))
+            buckets[key] = buckets.get(key, 0) + 1
+
+    connection = db.session.connection()
+    for (day, result, file_type), delta in rollups.items():
+        increment_counters(connection, DailyRollup.__table__,
+                           {'day': day, 'result': result, 'file_type': file_type}, delta)
+    for (day, file_type, bucket), count in buckets.items():
+        increment_counters(connection, DailyLatencyBucket.__table__,
+                           {'day': day, 'file_type': file_type, 'bucket': bucket}, {'count': count})
+
+def rollup_totals():
+    """All-time (total, fake, real) summed from the daily rollups"""
+    rows = db.session.query(DailyRollup.result, func.sum(DailyRollup.count))\
+        .group_by(DailyRollup.result)\
+        .all()
+    counts = {result: int(count or 0) for result, count in rows}
+    return sum(counts.values()), counts.get('fake', 0), counts.get('real', 0)
+
+def timeseries(days=30, file_type=None, today=None):
+    """
+    Per-day counts, average confidence and processing-time percentiles
+    for the last days days (UTC), oldest first - days without detections are zero
+    """
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+
+    series = {}
+    for offset in range(days):
+        current = start + timedelta(days=offset)
+        series[current] = {
+            'date': current.isoformat(),
+            'total': 0, 'fake': 0, 'real': 0, 'image': 0, 'video': 0,
+            '_confidence_sum': 0.0, '_processing_time_sum': 0.0,
+            '_buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        }
+
+    query = DailyRollup.query.filter(DailyRollup.day >= start, DailyRollup.day <= today)
+    bucket_query = DailyLatencyBucket.query.filter(DailyLatencyBucket.day >= start, DailyLatencyBucket.day <= today)
+    if file_type:
+        query = query.filter(DailyRollup.file_type == file_type)
+        bucket_query = bucket_query.filter(DailyLatencyBucket.file_type == file_type)
+
+    for row in query.all():
+        entry = series[_as_date(row.day)]
+        entry['total'] += row.count
+        entry[row.result] = entry.get(row.result, 0) + row.count
+        entry[row.file_type] = entry.get(row.file_type, 0) + row.count
+        entry['_confidence_sum'] += row.confidence_sum
+        entry['_processing_time_sum'] += row.processing_time_sum
+
+    for row in bucket_query.all():
+        series[_as_date(row.day)]['_buckets'][row.bucket] += row.count
+
+    points = []
+    for entry in series.values():
+        total = entry['total']
+        confidence_sum = entry.pop('_confidence_sum')
+        processing_time_sum = entry.pop('_processing_time_sum')
+        buckets = entry.pop('_buckets')
+
+        entry['avg_confidence'] = round(confidence_sum / total, 2) if total else None
+        entry['processing_time_ms'] = {
+            'avg': round(processing_time_sum * 1000 / total, 1) if total else None,
+            'p50': histogram_percentile(buckets, 0.5),
+            'p90': histogram_percentile(buckets, 0.9),
+            'p99': histogram_percentile(buckets, 0.99)
+        }
+        points.append(entry)
+
+    return points
+
+def _as_date(value):
+    """Rollup day as a date (SQLite may hand back the stored string)"""
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def init_rollups():
+    """Register the rollup hook and backfill the tables if they are empty (call in an app context)"""
+    if not event.contains(Session, 'before_flush', _apply_deltas):
+        event.listen(Session, 'before_flush', _apply_deltas)
+
+    if db.session.query(DailyRollup.day).first() is None and db.session.query(Detection.id).first() is not None:
+        rebuild_rollups()
+        print("✓ Daily rollups rebuilt from detection history")
+
+
+if __name__ == "__main__":
+    from flask import Flask
+    from config import config
+
+    # Minimal app - just the database, no model loading
+    app = Flask(__name__)
+    app.config.from_object(config['default'])
+    config['default'].init_app(app)
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        rebuild_rollups()
+        rows = DailyRollup.query.count()
+        print(f"✓ Rebuilt daily rollups ({rows} day/result/file type rows)")
@@ -0,0 +1,99 @@
+"""
+Per-user detection counters
+The user_stats row for a user is adjusted inside the same flush (and so the
+same transaction) that inserts or deletes their detection_history rows, so
+/api/detection/stats reads one row instead of scanning the user's history.
+"""
+
+from sqlalchemy import event, func, case, select, insert
+from sqlalchemy.orm import Session
+from database import db, increment_counters
+from models import Detection, User, UserStats
+
+
+def _collect_deltas(session):
+    """Counter changes per user implied by the pending inserts and deletes"""
+    deltas = {}
+
+    for obj, sign in [(o, 1) for o in session.new] + [(o, -1) for o in session.deleted]:
+        if not isinstance(obj, Detection) or obj.user_id is None:
+            continue
+        delta = deltas.setdefault(obj.user_id, {'total': 0, 'fake_count': 0, 'real_count': 0, 'confidence_sum': 0.0})
+        delta['total'] += sign
+        delta['confidence_sum'] += sign * (obj.confidence or 0.0)
+        if obj.result == 'fake':
+            delta['fake_count'] += sign
+        elif obj.result == 'real':
+            delta['real_count'] += sign
+
+    return deltas
+
+def _apply_deltas(session, flush_context, instances):
+    """before_flush hook - upsert the counters on the flush's own connection"""
+    deltas = _collect_deltas(session)
+    deleted_users = [obj.id for obj in session.deleted if isinstance(obj, User) and obj.id is not None]
+    if not deltas and not deleted_users:
+        return
+
+    # Connection-level statements: same transaction, no re-entrant autoflush
+    connection = session.connection()
+    table = UserStats.__table__
+
+    for user_id, delta in deltas.items():
+        increment_counters(connection, table, {'user_id': user_id}, delta)
+
+    if deleted_users:
+        connection.execute(table.delete().where(table.c.user_id.in_(deleted_users)))
+
+def rebuild_user_stats():
+    """Recompute every user's counters from detection_history (one grouped query) and the archive"""
+    table = UserStats.__table__
+    db.session.execute(table.delete())
+    db.session.execute(insert(table).from_select(
+        ['user_id', 'total', 'fake_count', 'real_count', 'confidence_sum'],
+        select(
+            Detection.user_id,
+            func.count(Detection.id),
+            func.sum(case((Detection.result == 'fake', 1), else_=0)),
+            func.sum(case((Detection.result == 'real', 1), else_=0)),
+            func.sum(Detection.confidence)
+        ).group_by(Detection.user_id)
+    ))
+    _add_archived_stats()
+    db.session.commit()
+
+def _add_archived_stats():
+    """Fold archived detections (see detection_archive.py) into the rebuilt counters"""
+    from detection_archive import get_archive
+
+    users = {user_id for (user_id,) in db.session.query(User.id)}
+    totals = {}
+    for user_ids, results, confidences in get_archive().iter_columns('user_id', 'result', 'confidence'):
+        for user_id, result, confidence in zip(user_ids.tolist(), results, confidences.tolist()):
+            if user_id not in users:
+                continue
+            delta = totals.setdefault(user_id, {'total': 0, 'fake_count': 0, 'real_count': 0, 'confidence_sum': 0.0})
+            delta['total'] += 1
+            delta['fake_count'] += result == 'fake'
+            delta['real_count'] += result == 'real'
+            delta['confidence_sum'] += confidence
+
+    connection = db.session.connection()
+    for user_id, delta in totals.items():
+        increment_counters(connection, UserStats.__table__, {'user_id': user_id}, delta)
+
+def get_user_stats(user_id):
+    """Counters for one user - O(1), independent of history size"""
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        return UserStats(user_id=user_id, total=0, fake_count=0, real_count=0, confidence_sum=0.0)
+    return stats
+
+def init_user_stats():
+    """Register the counter hook and backfill the table if it is empty (call in an app context)"""
+    if not event.contains(Session, 'before_flush', _apply_deltas):
+        event.listen(Session, 'before_flush', _apply_deltas)
+
+    if db.session.query(UserStats.user_id).first() is None and db.session.query(Detection.id).first() is not None:
+        rebuild_user_stats()
+        print("✓ User stats rebuilt from detection history")
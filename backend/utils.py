@@ -1,23 +1,47 @@
 from flask import request
 from models import User
+from auth_cache import get_principal_cache, principal_from_user
 import jwt
 from config import Config
 import os
 from werkzeug.utils import secure_filename
 import uuid
+import hashlib
+import base64
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Chunk size used when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 def verify_token():
-    """Verify JWT token and return user"""
+    """
+    Verify JWT token and return the caller as a Principal (id, is_admin, is_verified)
+    Repeat tokens are served from the principal cache without touching the database
+    """
     try:
         token = request.headers.get('Authorization', '').replace('Bearer ', '')
         
         if not token:
             return None
         
+        cache = get_principal_cache() if Config.AUTH_CACHE_ENABLED else None
+        if cache is not None:
+            principal = cache.get(token)
+            if principal is not None:
+                return principal
+        
         payload = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=['HS256'])
         user = User.query.get(payload['user_id'])
         
-        return user
+        if not user:
+            return None
+        
+        principal = principal_from_user(user)
+        if cache is not None:
+            cache.put(token, principal, payload.get('exp'))
+        
+        return principal
         
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
@@ -36,18 +60,107 @@ def allowed_file(filename, file_type='image'):
     
     return False
 
-def save_upload_file(file, subfolder='images'):
-    """Save uploaded file and return path"""
+def make_upload_path(filename, subfolder='images'):
+    """Return a unique path under the upload folder, creating the directory"""
     # Create upload directory if it doesn't exist
     upload_dir = os.path.join(Config.UPLOAD_FOLDER, subfolder)
     os.makedirs(upload_dir, exist_ok=True)
     
     # Generate unique filename
-    filename = secure_filename(file.filename)
-    unique_filename = f"{uuid.uuid4().hex}_{filename}"
-    file_path = os.path.join(upload_dir, unique_filename)
+    unique_filename = f"{uuid.uuid4().hex}_{secure_filename(filename)}"
+    return os.path.join(upload_dir, unique_filename)
+
+def save_upload_file(file, subfolder='images', with_hash=False):
+    """
+    Save uploaded file and return path
+    With with_hash=True the file is SHA-256 hashed while it streams to disk
+    and (path, hex_digest) is returned instead
+    """
+    file_path = make_upload_path(file.filename, subfolder)
     
     # Save file
-    file.save(file_path)
+    if not with_hash:
+        file.save(file_path)
+        return file_path
+    
+    sha256 = hashlib.sha256()
+    with open(file_path, 'wb') as out:
+        while True:
+            chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            out.write(chunk)
+    
+    return file_path, sha256.hexdigest()
+
+def read_upload_file(file):
+    """Read an uploaded file into memory - returns (bytes, sha256 hex digest)"""
+    data = file.stream.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+# Background writer for uploads persisted after inference (created on first use)
+_UPLOAD_WRITER = None
+
+def _write_bytes(data, file_path):
+    try:
+        with open(file_path, 'wb') as out:
+            out.write(data)
+    except Exception as e:
+        print(f"Error persisting upload {file_path}: {e}")
+
+def retain_upload(data, filename, subfolder='images', result=None):
+    """
+    Persist an already-analyzed upload according to Config.UPLOAD_RETENTION
+    ('all', 'fake' or 'none'). The write happens on a background thread, off
+    the request's hot path. Returns the path it will be written to, or '' if
+    the policy discards the file.
+    """
+    policy = Config.UPLOAD_RETENTION
+    if policy == 'none' or (policy == 'fake' and result != 'fake'):
+        return ''
+    
+    global _UPLOAD_WRITER
+    if _UPLOAD_WRITER is None:
+        _UPLOAD_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload-writer')
+    
+    file_path = make_upload_path(filename, subfolder)
+    _UPLOAD_WRITER.submit(_write_bytes, data, file_path)
+    return file_path
+
+def encode_cursor(created_at, row_id):
+    """Opaque keyset cursor for the position after (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor - raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def keyset_page(query, created_at_column, id_column, limit, cursor=None, key=None):
+    """
+    Fetch one page newest-first, continuing after cursor
+    Seeks with (created_at, id) < cursor, so every page costs the same as the first.
+    key maps a result row to the object holding created_at/id (default: the row).
+    Returns (rows, next_cursor) - next_cursor is None on the last page
+    """
+    from sqlalchemy import tuple_
+    
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(created_at_column, id_column) < (created_at, row_id))
+    
+    rows = query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = key(rows[-1]) if key else rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
     
-    return file_path
\ No newline at end of file
+    return rows, next_cursor
@@ -0,0 +1,159 @@
+"""
+Background video analysis jobs
+A bounded local thread pool runs predict_video outside the request thread.
+Job state lives in the analysis_jobs table so queued work survives a restart.
+"""
+
+import threading
+import uuid
+import json
+from concurrent.futures import ThreadPoolExecutor
+from database import db
+from models import AnalysisJob, Detection
+
+
+class JobQueueFull(Exception):
+    """Raised when the worker pool already has its maximum of pending jobs"""
+
+
+class VideoJobRunner:
+    """Bounded worker pool for video analysis jobs"""
+
+    def __init__(self, app, max_workers=2, max_pending=16):
+        self.app = app
+        self.max_pending = max(1, int(max_pending))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, int(max_workers)),
+            thread_name_prefix='video-job'
+        )
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def create_job(self, user_id, file_name, file_path, content_hash=None, tier=None):
+        """Record a new queued job and hand it to the pool - returns the job"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull('Too many videos are being analyzed, please retry shortly')
+            self._pending += 1
+
+        try:
+            job = AnalysisJob(
+                id=uuid.uuid4().hex,
+                user_id=user_id,
+                file_name=file_name,
+                file_type='video',
+                file_path=file_path,
+                content_hash=content_hash,
+                tier=tier,
+                status='queued'
+            )
+            db.session.add(job)
+            db.session.commit()
+        except Exception:
+            self._release()
+            raise
+
+        self._executor.submit(self._run_job, job.id)
+        return job
+
+    def resume_pending(self):
+        """Re-queue jobs left queued or running by a previous process"""
+        with self.app.app_context():
+            jobs = AnalysisJob.query.filter(
+                AnalysisJob.status.in_(['queued', 'running'])
+            ).all()
+
+            for job in jobs:
+                job.status = 'queued'
+            db.session.commit()
+
+            job_ids = [job.id for job in jobs]
+
+        for job_id in job_ids:
+            with self._lock:
+                self._pending += 1
+            self._executor.submit(self._run_job, job_id)
+
+        if job_ids:
+            print(f"✓ Resumed {len(job_ids)} video analysis job(s)")
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _claim(self, job_id):
+        """Atomically move a job from queued to running - False if another worker has it"""
+        claimed = AnalysisJob.query.filter_by(id=job_id, status='queued')\
+            .update({'status': 'running'}, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def _run_job(self, job_id):
+        """Analyze one video and link the resulting Detection row to the job"""
+        try:
+            with self.app.app_context():
+                if not self._claim(job_id):
+                    return
+
+                job = AnalysisJob.query.get(job_id)
+
+                try:
+                    from detection_routes import predict_video, store_cached_result, analysis_cost
+                    from analysis_tiers import resolve_tier
+                    plan = resolve_tier(job.tier)
+                    details = {}
+                    result, confidence, processing_time = predict_video(job.file_path, details=details, plan=plan)
+
+                    extra_data = {'cache_hit': False, **details, **analysis_cost(plan, details, processing_time)}
+                    if job.content_hash:
+                        store_cached_result(job.content_hash, 'video', job.file_path,
+                                            result, confidence, details, plan)
+                        extra_data['content_hash'] = job.content_hash
+
+                    detection = Detection(
+                        user_id=job.user_id,
+                        file_name=job.file_name,
+                        file_type='video',
+                        file_path=job.file_path,
+                        result=result,
+                        confidence=confidence,
+                        processing_time=processing_time,
+                        extra_data=json.dumps(extra_data)
+                    )
+                    db.session.add(detection)
+                    db.session.flush()
+
+                    job.detection_id = detection.id
+                    job.status = 'done'
+                    db.session.commit()
+
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Video job {job_id} failed: {e}")
+                    job = AnalysisJob.query.get(job_id)
+                    job.status = 'failed'
+                    job.error = str(e)
+                    db.session.commit()
+        finally:
+            self._release()
+
+
+# Shared runner (created by init_video_jobs)
+JOB_RUNNER = None
+
+def init_video_jobs(app):
+    """Create the shared job runner and resume unfinished jobs"""
+    global JOB_RUNNER
+    from config import Config
+
+    JOB_RUNNER = VideoJobRunner(
+        app,
+        max_workers=Config.VIDEO_JOB_WORKERS,
+        max_pending=Config.VIDEO_JOB_MAX_PENDING
+    )
+    JOB_RUNNER.resume_pending()
+    return JOB_RUNNER
+
+def get_job_runner():
+    """Return the shared job runner (None until init_video_jobs runs)"""
+    return JOB_RUNNER
@@ -0,0 +1,217 @@
+"""
+Pipelined video analyzer
+Decode, preprocessing and inference run as three overlapping stages:
+
+    decode thread ──frames──▶ preprocess thread ──batches──▶ inference (caller)
+
+Both hand-offs are bounded queues, so a slow stage back-pressures the ones
+before it instead of buffering the whole video. Batches are written into a
+small pool of reusable FrameBatch buffers. Per-stage busy/wait times show
+which stage limits throughput.
+"""
+
+import queue
+import threading
+import time
+from frame_sampler import sample_frames
+from preprocessing import FrameBatch
+
+_DONE = object()
+
+
+class _StageError:
+    """Carries an exception from a worker stage to the consumer"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class StageTimer:
+    """Busy and waiting time for one pipeline stage"""
+
+    def __init__(self):
+        self.busy = 0.0
+        self.wait = 0.0
+        self.items = 0
+
+    def to_dict(self):
+        return {'busy_s': round(self.busy, 4), 'wait_s': round(self.wait, 4), 'items': self.items}
+
+
+class PipelinedVideoAnalyzer:
+    """Overlap decoding, preprocessing and inference for one video"""
+
+    def __init__(self, predict_fn, batch_size=16, frame_queue_size=32, batch_buffers=2, max_gap=None):
+        """
+        Args:
+            predict_fn: Callable scoring a (N, 224, 224, 3) uint8 batch
+            batch_size: Frames per inference batch
+            frame_queue_size: Decoded frames buffered ahead of preprocessing
+            batch_buffers: Reusable batch buffers (2 = double buffering)
+            max_gap: Frame sampler seek threshold (None = measured per video)
+        """
+        self.predict_fn = predict_fn
+        self.batch_size = max(1, int(batch_size))
+        self.frame_queue_size = max(1, int(frame_queue_size))
+        self.batch_buffers = max(1, int(batch_buffers))
+        self.max_gap = max_gap
+
+    def run(self, cap, frame_indices):
+        """Score the given frames - returns (predictions in frame order, stage timings)"""
+        frame_queue = queue.Queue(maxsize=self.frame_queue_size)
+        batch_queue = queue.Queue(maxsize=self.batch_buffers)
+        free_batches = queue.Queue()
+        for _ in range(self.batch_buffers):
+            free_batches.put(FrameBatch(self.batch_size))
+
+        stop = threading.Event()
+        timers = {'decode': StageTimer(), 'preprocess': StageTimer(), 'inference': StageTimer()}
+
+        decoder = threading.Thread(
+            target=self._decode, args=(cap, frame_indices, frame_queue, stop, timers['decode']),
+            name='video-decode', daemon=True
+        )
+        preprocessor = threading.Thread(
+            target=self._preprocess, args=(frame_queue, batch_queue, free_batches, stop, timers['preprocess']),
+            name='video-preprocess', daemon=True
+        )
+
+        started = time.perf_counter()
+        decoder.start()
+        preprocessor.start()
+
+        predictions = []
+        timer = timers['inference']
+        try:
+            while True:
+                waited = time.perf_counter()
+                item = batch_queue.get()
+                timer.wait += time.perf_counter() - waited
+
+                if item is _DONE:
+                    break
+                if isinstance(item, _StageError):
+                    raise item.error
+
+                busy = time.perf_counter()
+                predictions.extend(float(s) for s in self.predict_fn(item.view()))
+                timer.busy += time.perf_counter() - busy
+                timer.items += item.count
+
+                item.clear()
+                free_batches.put(item)
+        finally:
+            stop.set()
+            decoder.join(timeout=5)
+            preprocessor.join(timeout=5)
+
+        stats = {name: t.to_dict() for name, t in timers.items()}
+        stats['wall_s'] = round(time.perf_counter() - started, 4)
+        stats['bottleneck'] = max(timers, key=lambda name: timers[name].busy)
+        record_run(stats)
+        return predictions, stats
+
+    def _put(self, target, item, stop, timer):
+        """Blocking put that gives up when the pipeline is stopping - False if stopped"""
+        waited = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            timer.wait += time.perf_counter() - waited
+
+    def _get(self, source, stop, timer):
+        """Blocking get that gives up when the pipeline is stopping - _DONE if stopped"""
+        waited = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            timer.wait += time.perf_counter() - waited
+
+    def _decode(self, cap, frame_indices, frame_queue, stop, timer):
+        try:
+            frames = sample_frames(cap, frame_indices, self.max_gap)
+            while True:
+                busy = time.perf_counter()
+                item = next(frames, _DONE)
+                timer.busy += time.perf_counter() - busy
+
+                if item is _DONE:
+                    break
+                timer.items += 1
+                if not self._put(frame_queue, item[1], stop, timer):
+                    return
+            self._put(frame_queue, _DONE, stop, timer)
+        except Exception as e:
+            self._put(frame_queue, _StageError(e), stop, timer)
+
+    def _preprocess(self, frame_queue, batch_queue, free_batches, stop, timer):
+        batch = None
+        try:
+            while True:
+                item = self._get(frame_queue, stop, timer)
+
+                if item is _DONE or isinstance(item, _StageError):
+                    if batch is not None and batch.count and not isinstance(item, _StageError):
+                        if not self._put(batch_queue, batch, stop, timer):
+                            return
+                    self._put(batch_queue, item, stop, timer)
+                    return
+
+                if batch is None:
+                    batch = self._get(free_batches, stop, timer)
+                    if batch is _DONE:
+                        return
+
+                busy = time.perf_counter()
+                batch.add(item)
+                timer.busy += time.perf_counter() - busy
+                timer.items += 1
+
+                if batch.is_full():
+                    if not self._put(batch_queue, batch, stop, timer):
+                        return
+                    batch = None
+        except Exception as e:
+            self._put(batch_queue, _StageError(e), stop, timer)
+
+
+# Cumulative stage timings across all pipelined runs (for tuning)
+_TOTALS_LOCK = threading.Lock()
+_TOTALS = {'runs': 0, 'stages': {}}
+
+
+def merge_stage_stats(total, stats):
+    """Add one run's stage timings into a running total dict (in place)"""
+    for name in ('decode', 'preprocess', 'inference'):
+        stage = total.setdefault(name, {'busy_s': 0.0, 'wait_s': 0.0, 'items': 0})
+        for key in stage:
+            stage[key] = round(stage[key] + stats[name][key], 4)
+    total['wall_s'] = round(total.get('wall_s', 0.0) + stats['wall_s'], 4)
+    total['bottleneck'] = max(('decode', 'preprocess', 'inference'), key=lambda n: total[n]['busy_s'])
+    return total
+
+
+def record_run(stats):
+    """Add a finished run to the cumulative totals"""
+    with _TOTALS_LOCK:
+        _TOTALS['runs'] += 1
+        merge_stage_stats(_TOTALS['stages'], stats)
+
+
+def pipeline_stats():
+    """Cumulative per-stage busy/wait time - the stage with most busy time limits throughput"""
+    with _TOTALS_LOCK:
+        stages = {name: dict(value) if isinstance(value, dict) else value
+                  for name, value in _TOTALS['stages'].items()}
+        return {'runs': _TOTALS['runs'], 'stages': stages}
@@ -0,0 +1,58 @@
+"""
+Adaptive early-exit video scoring
+Frames are scored in coarse-to-fine order (every prefix of the order is spread
+evenly over the video) and sampling stops as soon as a sequential test on the
+running score distribution is decisive. Ambiguous videos get more frames, up
+to a fixed budget.
+"""
+
+import math
+
+
+def van_der_corput(k):
+    """k-th term of the base-2 van der Corput sequence: 0, 0.5, 0.25, 0.75, 0.125, ..."""
+    value, denominator = 0.0, 1.0
+    while k:
+        denominator *= 2
+        k, remainder = divmod(k, 2)
+        value += remainder / denominator
+    return value
+
+
+def coarse_to_fine_indices(total_frames, max_frames):
+    """Unique frame indices in coarse-to-fine order, at most max_frames of them"""
+    limit = min(max_frames, total_frames)
+    order, seen = [], set()
+    k = 0
+
+    while len(order) < limit and k < 4 * total_frames + 16:
+        idx = min(total_frames - 1, int(van_der_corput(k) * total_frames))
+        if idx not in seen:
+            seen.add(idx)
+            order.append(idx)
+        k += 1
+
+    return order
+
+
+def sequential_decision(scores, z=2.58, min_frames=5):
+    """
+    Sequential test on the running mean fake score
+
+    Returns 'fake' or 'real' once the z-confidence interval of the mean
+    excludes the 0.5 decision boundary, or None while it is still ambiguous.
+    """
+    n = len(scores)
+    if n < max(2, min_frames):
+        return None
+
+    mean = sum(scores) / n
+    variance = sum((s - mean) ** 2 for s in scores) / (n - 1)
+    # Floor the spread so a handful of identical scores cannot look infinitely certain
+    standard_error = math.sqrt(max(variance, 1e-4) / n)
+
+    if mean - z * standard_error > 0.5:
+        return 'fake'
+    if mean + z * standard_error < 0.5:
+        return 'real'
+    return None
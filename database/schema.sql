@@ -25,6 +25,73 @@ CREATE TABLE IF NOT EXISTS detection_history (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- Per-user detection counters (updated in the same transaction as each insert)
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    fake_count INTEGER NOT NULL DEFAULT 0,
+    real_count INTEGER NOT NULL DEFAULT 0,
+    confidence_sum REAL NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Daily detection rollups for the admin dashboard (maintained on insert)
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day DATE NOT NULL,  -- UTC day of created_at
+    result TEXT NOT NULL,  -- 'real' or 'fake'
+    file_type TEXT NOT NULL,  -- 'image' or 'video'
+    count INTEGER NOT NULL DEFAULT 0,
+    confidence_sum REAL NOT NULL DEFAULT 0,
+    processing_time_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, result, file_type)
+);
+
+-- Daily processing-time histogram (bucket = index into rollups.LATENCY_BUCKETS_MS)
+CREATE TABLE IF NOT EXISTS daily_latency_buckets (
+    day DATE NOT NULL,
+    file_type TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, file_type, bucket)
+);
+
+-- Change counters behind the API's ETags ('user:<id>', 'detections', 'users')
+CREATE TABLE IF NOT EXISTS data_versions (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Background video analysis jobs
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    id TEXT PRIMARY KEY,  -- uuid4 hex
+    user_id INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    file_type TEXT NOT NULL DEFAULT 'video',
+    file_path TEXT NOT NULL,
+    content_hash TEXT,  -- SHA-256 of the upload, for the result cache
+    tier TEXT,  -- Analysis tier, NULL = default tier
+    status TEXT NOT NULL DEFAULT 'queued',  -- 'queued', 'running', 'done' or 'failed'
+    detection_id INTEGER,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (detection_id) REFERENCES detection_history(id) ON DELETE SET NULL
+);
+
+-- Content-hash result cache (invalidated by model version)
+CREATE TABLE IF NOT EXISTS result_cache (
+    content_hash TEXT NOT NULL,  -- SHA-256 hex of the uploaded file
+    model_version TEXT NOT NULL,
+    file_type TEXT NOT NULL,  -- 'image' or 'video'
+    file_path TEXT,  -- First stored copy of the file
+    result TEXT NOT NULL,  -- 'real' or 'fake'
+    confidence REAL NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (content_hash, model_version)
+);
+
 -- Create default admin user
 INSERT OR IGNORE INTO users (id, full_name, email, password, is_admin, is_verified) 
 VALUES (1, 'Admin User', 'admin@deepfake.com', 'admin123', 1, 1);
@@ -36,4 +103,6 @@ VALUES (2, 'Test User', 'test@example.com', 'test123', 0, 1);
 -- Create indexes
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_detection_user_id ON detection_history(user_id);
-CREATE INDEX IF NOT EXISTS idx_detection_created_at ON detection_history(created_at);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_detection_created_at ON detection_history(created_at);
+CREATE INDEX IF NOT EXISTS idx_detection_user_created ON detection_history(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON analysis_jobs(status);
\ No newline at end of file
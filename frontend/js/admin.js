@@ -70,12 +70,19 @@ if (window.location.pathname.includes('admin-dashboard')) {
         }
     }
     
-    // Load users
-    async function loadUsers() {
+    // Load users - one page at a time (the API returns 50 per page)
+    let usersPage = 1;
+    
+    async function loadUsers(page = usersPage) {
         try {
-            const data = await API.request(API_CONFIG.ENDPOINTS.ADMIN_USERS);
+            const data = await API.request(`${API_CONFIG.ENDPOINTS.ADMIN_USERS}?page=${page}`);
             const usersList = document.getElementById('users-list');
+            usersPage = page;
+            updateUsersPagination(data.pagination);
             
+            if (data.users.length === 0 && page > 1) {
+                return loadUsers(page - 1);  // Last page emptied since it was shown
+            }
             if (data.users.length === 0) {
                 usersList.innerHTML = '<p class="empty-state">No users found.</p>';
                 return;
@@ -114,11 +121,47 @@ if (window.location.pathname.includes('admin-dashboard')) {
         }
     }
     
-    // Load detections
+    // Previous/next controls for the users table
+    function updateUsersPagination(pagination) {
+        const container = document.getElementById('users-pagination');
+        if (!pagination || pagination.pages <= 1) {
+            container.style.display = 'none';
+            return;
+        }
+        
+        container.style.display = 'flex';
+        document.getElementById('users-page-info').textContent =
+            `Page ${pagination.page} of ${pagination.pages} (${pagination.total} users)`;
+        document.getElementById('users-prev-btn').disabled = pagination.page <= 1;
+        document.getElementById('users-next-btn').disabled = pagination.page >= pagination.pages;
+    }
+    
+    document.getElementById('users-prev-btn').addEventListener('click', () => loadUsers(usersPage - 1));
+    document.getElementById('users-next-btn').addEventListener('click', () => loadUsers(usersPage + 1));
+    
+    // Load detections - 50 at a time, following the API's next_cursor
+    let detectionsCursor = null;
+    
+    function detectionRow(detection) {
+        return `
+            <tr>
+                <td>${detection.id}</td>
+                <td>${detection.full_name}</td>
+                <td>${detection.file_name}</td>
+                <td>${detection.file_type}</td>
+                <td><span class="result-badge ${detection.result}">${detection.result.toUpperCase()}</span></td>
+                <td>${detection.confidence}%</td>
+                <td>${new Date(detection.created_at).toLocaleDateString()}</td>
+            </tr>
+        `;
+    }
+    
     async function loadDetections() {
         try {
             const data = await API.request(API_CONFIG.ENDPOINTS.ADMIN_DETECTIONS);
             const detectionsList = document.getElementById('detections-list');
+            detectionsCursor = data.next_cursor;
+            updateDetectionsLoadMore();
             
             if (data.detections.length === 0) {
                 detectionsList.innerHTML = '<p class="empty-state">No detections found.</p>';
@@ -138,18 +181,8 @@ if (window.location.pathname.includes('admin-dashboard')) {
                             <th>Date</th>
                         </tr>
                     </thead>
-                    <tbody>
-                        ${data.detections.map(detection => `
-                            <tr>
-                                <td>${detection.id}</td>
-                                <td>${detection.full_name}</td>
-                                <td>${detection.file_name}</td>
-                                <td>${detection.file_type}</td>
-                                <td><span class="result-badge ${detection.result}">${detection.result.toUpperCase()}</span></td>
-                                <td>${detection.confidence}%</td>
-                                <td>${new Date(detection.created_at).toLocaleDateString()}</td>
-                            </tr>
-                        `).join('')}
+                    <tbody id="detections-rows">
+                        ${data.detections.map(detectionRow).join('')}
                     </tbody>
                 </table>
             `;
@@ -160,6 +193,32 @@ if (window.location.pathname.includes('admin-dashboard')) {
         }
     }
     
+    // Append the next page of detections
+    async function loadMoreDetections() {
+        const button = document.getElementById('detections-load-more-btn');
+        button.disabled = true;
+        
+        try {
+            const data = await API.request(
+                `${API_CONFIG.ENDPOINTS.ADMIN_DETECTIONS}?cursor=${encodeURIComponent(detectionsCursor)}`
+            );
+            document.getElementById('detections-rows')
+                .insertAdjacentHTML('beforeend', data.detections.map(detectionRow).join(''));
+            detectionsCursor = data.next_cursor;
+        } catch (error) {
+            console.error('Failed to load more detections:', error);
+        } finally {
+            button.disabled = false;
+            updateDetectionsLoadMore();
+        }
+    }
+    
+    function updateDetectionsLoadMore() {
+        document.getElementById('detections-load-more').style.display = detectionsCursor ? 'flex' : 'none';
+    }
+    
+    document.getElementById('detections-load-more-btn').addEventListener('click', loadMoreDetections);
+    
     // Tab switching
     const tabButtons = document.querySelectorAll('.tab-btn');
     if (tabButtons.length > 0) {
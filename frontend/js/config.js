@@ -10,15 +10,20 @@ const API_CONFIG = {
         // Detection endpoints
         UPLOAD_IMAGE: '/detection/upload-image',
         UPLOAD_VIDEO: '/detection/upload-video',
+        UPLOAD_BATCH: '/detection/upload-batch',
         HISTORY: '/detection/history',
         USER_STATS: '/detection/stats',
         DETECTION_DETAIL: '/detection/detection',
+        UPLOAD_VIDEO_TIMELINE: '/detection/upload-video-timeline',
+        JOB_STATUS: '/detection/jobs',
         
         // Admin endpoints
         ADMIN_USERS: '/admin/users',
         ADMIN_DETECTIONS: '/admin/detections',
+        ADMIN_EXPORT: '/admin/detections/export',
         ADMIN_STATS: '/admin/stats',
         ADMIN_DASHBOARD: '/admin/dashboard-stats',
+        ADMIN_TIMESERIES: '/admin/timeseries',
         ADMIN_USER_DETAIL: '/admin/user'
     }
 };
@@ -38,18 +43,35 @@ const API = {
             headers['Authorization'] = `Bearer ${token}`;
         }
         
+        // Revalidate cached GET bodies - the server answers 304 when nothing changed
+        const method = (options.method || 'GET').toUpperCase();
+        const cached = method === 'GET' ? ResponseCache.get(url) : null;
+        if (cached) {
+            headers['If-None-Match'] = cached.etag;
+        }
+        
         try {
             const response = await fetch(url, {
                 ...options,
-                headers
+                headers,
+                cache: 'no-store'  // Conditional requests are handled here, not by the HTTP cache
             });
             
+            if (response.status === 304 && cached) {
+                return cached.data;
+            }
+            
             const data = await response.json();
             
             if (!response.ok) {
                 throw new Error(data.error || 'Request failed');
             }
             
+            const etag = response.headers.get('ETag');
+            if (method === 'GET' && etag) {
+                ResponseCache.set(url, etag, data);
+            }
+            
             return data;
         } catch (error) {
             console.error('API Error:', error);
@@ -97,6 +119,63 @@ const API = {
     }
 };
 
+// Cached GET bodies keyed by URL, with the ETag they were served with.
+// Kept in sessionStorage (per tab, never crowding out the login token in
+// localStorage) and bounded to the MAX_ENTRIES most recently used URLs -
+// every ?page= / ?cursor= variant is its own entry
+const ResponseCache = {
+    PREFIX: 'etag:',
+    INDEX_KEY: 'etag-index',
+    MAX_ENTRIES: 30,
+    
+    index() {
+        try {
+            return JSON.parse(sessionStorage.getItem(this.INDEX_KEY)) || [];
+        } catch (error) {
+            return [];
+        }
+    },
+    
+    // Move url to the most recently used end of the index, evicting the oldest
+    touch(url) {
+        const index = this.index().filter(entry => entry !== url);
+        index.push(url);
+        while (index.length > this.MAX_ENTRIES) {
+            sessionStorage.removeItem(this.PREFIX + index.shift());
+        }
+        sessionStorage.setItem(this.INDEX_KEY, JSON.stringify(index));
+    },
+    
+    get(url) {
+        try {
+            const entry = sessionStorage.getItem(this.PREFIX + url);
+            if (!entry) {
+                return null;
+            }
+            this.touch(url);
+            return JSON.parse(entry);
+        } catch (error) {
+            return null;
+        }
+    },
+    
+    set(url, etag, data) {
+        try {
+            sessionStorage.setItem(this.PREFIX + url, JSON.stringify({ etag, data }));
+            this.touch(url);
+        } catch (error) {
+            // Storage full - start over rather than keep stale entries around
+            console.warn('Response cache full:', error);
+            this.clear();
+        }
+    },
+    
+    clear() {
+        this.index().forEach(url => sessionStorage.removeItem(this.PREFIX + url));
+        sessionStorage.removeItem(this.INDEX_KEY);
+    }
+};
+
 // Storage utilities
 const Storage = {
     setToken(token) {
@@ -126,6 +205,7 @@ const Storage = {
     
     clear() {
         localStorage.clear();
+        ResponseCache.clear();
     },
     
     isAuthenticated() {
@@ -7,6 +7,7 @@ document.getElementById('user-name').textContent = user.full_name;
 let allHistory = [];
 let filteredHistory = [];
 let currentPage = 0;
+let historyCursor = null;  // Cursor for the next server page, null once all are loaded
 const itemsPerPage = 20;
 
 // Load history
@@ -14,6 +15,7 @@ async function loadHistory() {
     try {
         const data = await API.request(API_CONFIG.ENDPOINTS.HISTORY + '?limit=100');
         allHistory = data.history;
+        historyCursor = data.next_cursor;
         applyFilters();
     } catch (error) {
         console.error('Failed to load history:', error);
@@ -22,8 +24,17 @@ async function loadHistory() {
     }
 }
 
+// Fetch the next page of history from the server
+async function loadMoreHistory() {
+    const data = await API.request(
+        `${API_CONFIG.ENDPOINTS.HISTORY}?limit=100&cursor=${encodeURIComponent(historyCursor)}`
+    );
+    allHistory = allHistory.concat(data.history);
+    historyCursor = data.next_cursor;
+}
+
 // Apply filters
-function applyFilters() {
+function applyFilters(resetPage = true) {
     const typeFilter = document.getElementById('filter-type').value;
     const resultFilter = document.getElementById('filter-result').value;
     
@@ -33,7 +44,9 @@ function applyFilters() {
         return typeMatch && resultMatch;
     });
     
-    currentPage = 0;
+    if (resetPage) {
+        currentPage = 0;
+    }
     displayHistory();
 }
 
@@ -42,7 +55,7 @@ function displayHistory() {
     const historyList = document.getElementById('history-list');
     const loadMoreContainer = document.getElementById('load-more-container');
     
-    if (filteredHistory.length === 0) {
+    if (filteredHistory.length === 0 && !historyCursor) {
         historyList.innerHTML = '<p class="empty-state">No detections found.</p>';
         loadMoreContainer.style.display = 'none';
         return;
@@ -80,7 +93,7 @@ function displayHistory() {
     }).join('');
     
     // Show/hide load more button
-    if (end < filteredHistory.length) {
+    if (end < filteredHistory.length || historyCursor) {
         loadMoreContainer.style.display = 'block';
     } else {
         loadMoreContainer.style.display = 'none';
@@ -88,14 +101,24 @@ function displayHistory() {
 }
 
 // Load more
-document.getElementById('load-more-btn').addEventListener('click', () => {
+document.getElementById('load-more-btn').addEventListener('click', async () => {
     currentPage++;
+    
+    // Shown everything loaded so far - fetch until the next page is full or history runs out
+    try {
+        while (historyCursor && (currentPage + 1) * itemsPerPage > filteredHistory.length) {
+            await loadMoreHistory();
+            applyFilters(false);
+        }
+    } catch (error) {
+        console.error('Failed to load more history:', error);
+    }
     displayHistory();
 });
 
 // Filter event listeners
-document.getElementById('filter-type').addEventListener('change', applyFilters);
-document.getElementById('filter-result').addEventListener('change', applyFilters);
+document.getElementById('filter-type').addEventListener('change', () => applyFilters());
+document.getElementById('filter-result').addEventListener('change', () => applyFilters());
 
 // View details
 function viewDetails(id) {